@@ -7,42 +7,72 @@ and role-based authorization.
 
 Functions:
 - get_db()             → Provide a SQLAlchemy session (auto-closes after request).
-- get_current_user()   → Extract and validate current user from JWT.
+- get_uow()            → The request's session as one unit of work (single commit when the endpoint succeeds).
+- decode_request_token() → Decode the bearer token once per request (cached on request.state).
+- get_current_user()   → Extract and validate current user from JWT (user row served from cache).
 - require_role(role)   → Dependency factory to enforce a specific UserRole.
+- Pagination           → `limit`/`after` query params; sends the next cursor in `X-Next-Cursor`.
+- NestedCollections    → `include`/`nested_limit`/`active_loans_only` bounds for embedded loans and events.
 """
 
 import time
 from typing import Generator
-from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
 from sqlalchemy.orm import Session
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
-from app.db.session import SessionLocal
-from app.db.models import User    
-from app.db import get_db    
+from app.db.models import User
+from app.db import get_db, unit_of_work
+from app.core import metrics
+from app.core.config import settings
+from app.core.query_budget import query_budgets
 from app.core.security import verify_token
-from app.core.enums import UserRole
-from app.services.event import log_event
+from app.core.enums import NestedCollection, UserRole
+from app.db.models import Loan
+from app.db.session import QueryStats, query_stats
+from app.schemas.token import TokenPayload
+from app.services.event import capture_rules, queue_event
+from app.services.user import crud_user
 from app.utils import filters
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_uow(db: Session = Depends(get_db)) -> Generator[Session, None, None]:
+    """
+    Write endpoints: service calls only flush, and the request commits once after the
+    response body is serialized (rolled back if the endpoint raises).
+    """
+    with unit_of_work(db):
+        yield db
+
+
+def decode_request_token(request: Request, token: str) -> TokenPayload:
+    """Decode a bearer token at most once per request, sharing the payload via `request.state`."""
+    cached = getattr(request.state, "token", None)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    token_data = verify_token(token)
+    request.state.token = (token, token_data)
+    return token_data
+
+
+def get_current_user(request: Request, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
     """Validate JWT token and return the current active user."""
-    print("e")
-    token_data = verify_token(token) 
-    print("f")
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
-    print("g")
+    token_data = decode_request_token(request, token)
+    user = crud_user.get_cached(db, int(token_data.sub))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     if not user.is_active:
-        print("oh no")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
-    print("yay")
     return user
 
 def require_role(required_role: UserRole):
@@ -68,50 +98,146 @@ def require_roles(allowed_roles: list[UserRole]):
         return current_user
     return role_checker
 
-class ResponseTimeMiddleware(BaseHTTPMiddleware):
-    SKIP_PATHS = {"/", "/test"}
-
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in self.SKIP_PATHS:
-            return await call_next(request)
+class Pagination:
+    """Keyset pagination parameters; the cursor for the next page is returned in the `X-Next-Cursor` header."""
+
+    def __init__(
+            self,
+            response: Response,
+            limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+            after: str | None = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor"),
+    ):
+        self.response = response
+        self.limit = limit
+        self.after = after
+
+    def __call__(self, page: tuple[list, str | None]) -> list:
+        """Unpack a `(rows, next_cursor)` page from CRUDBase.paginate and expose the cursor."""
+        rows, next_cursor = page
+        if next_cursor:
+            self.response.headers["X-Next-Cursor"] = next_cursor
+        return rows
+
+
+class NestedCollections:
+    """Which nested collections a user/book response embeds, and how much of each (enforced in SQL)."""
+
+    def __init__(
+            self,
+            include: list[NestedCollection] | None = Query(None, description="Collections to embed (default: all)"),
+            nested_limit: int = Query(settings.NESTED_LIMIT_DEFAULT, ge=0, le=settings.NESTED_LIMIT_MAX,
+                                      description="Most recent rows per embedded collection"),
+            active_loans_only: bool = Query(False, description="Embed only loans not yet returned"),
+    ):
+        self.include = set(include) if include is not None else set(NestedCollection)
+        self.limit = nested_limit
+        self.active_loans_only = active_loans_only
+
+    def plan(self) -> dict[str, list]:
+        """Collection name → extra WHERE criteria, for CRUDBase.load_collections."""
+        plan = {collection.value: [] for collection in self.include}
+        if self.active_loans_only and NestedCollection.LOANS.value in plan:
+            plan[NestedCollection.LOANS.value].append(Loan.return_date.is_(None))
+        return plan
+
+
+class ResponseTimeMiddleware:
+    """
+    Pure ASGI timing middleware: `X-Response-Time` header, latency metrics and a
+    buffered `Event` for every request the capture rules keep (sampled rows carry their weight).
+    It also collects the request's `QueryStats`: `X-DB-Queries` and `X-DB-Time` (ms) report
+    the SQL run before the response started, checked against `query_budgets`.
+
+    It wraps `send` to read the status and content-length from the response start
+    message, so the body streams through untouched. The header carries the time to
+    the response start (headers have to go out before the body); metrics and the event
+    record the full duration, body included.
+    """
+
+    SKIP_PATHS = {"/", "/test", "/metrics"}
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
 
         start = time.perf_counter()
-        response: Response = await call_next(request)
-        duration_ms = int((time.perf_counter() - start) * 1000)
-        response.headers["X-Response-Time"] = str(duration_ms)
-
+        status_code = 500
+        content_length: str | None = None
+        stats = QueryStats()
+        rejected: Message | None = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code, content_length, rejected
+            if rejected is not None:
+                return  # the original body of a response replaced in strict mode
+            if message["type"] == "http.response.start":
+                problems = query_budgets.check(scope["method"], self.route_template(scope), stats)
+                if problems and query_budgets.strict:
+                    message, rejected = query_budgets.rejection(problems)
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                content_length = headers.get("content-length")
+                headers["X-Response-Time"] = str(int((time.perf_counter() - start) * 1000))
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time"] = f"{stats.seconds * 1000:.1f}"
+            await send(message)
+            if rejected is not None:
+                await send(rejected)
+
+        metrics.track_in_flight(1)
+        stats_token = query_stats.set(stats)
         try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(stats_token)
+            metrics.track_in_flight(-1)
+            elapsed = time.perf_counter() - start
+            metrics.observe_request(self.route_template(scope), scope["method"], status_code, elapsed)
+            self.record(scope, status_code, content_length, int(elapsed * 1000))
+
+    @staticmethod
+    def record(scope: Scope, status_code: int, content_length: str | None, duration_ms: int) -> None:
+        """Queue the request's `Event` row if `capture_rules` keep it; never lets logging break the request."""
+        try:
+            weight = capture_rules.weight(scope["method"], scope["path"], status_code, duration_ms)
+            if weight is None:
+                return
+            request = Request(scope)
             user_id: int | None = None
             auth = request.headers.get("authorization")
             if auth and auth.startswith("Bearer "):
                 try:
-                    data = verify_token(auth.split(" ", 1)[1])
+                    data = decode_request_token(request, auth.split(" ", 1)[1])
                     if data and data.sub:
                         user_id = int(data.sub)
-                except (JWTError, ValueError, TypeError):
+                except (HTTPException, ValueError, TypeError):
                     pass
 
+            client = scope.get("client")
             meta = {
-                "path": request.url.path,
-                "method": request.method,
-                "query_params": str(request.query_params) or None,
+                "path": scope["path"],
+                "method": scope["method"],
+                "query_params": scope.get("query_string", b"").decode("latin-1") or None,
                 "user_agent": request.headers.get("user-agent"),
-                "content_length": response.headers.get("content-length"),
-                "remote_addr": getattr(request.client, "host", None),
+                "content_length": content_length,
+                "remote_addr": client[0] if client else None,
             }
-            meta = filters(**meta)
-
-            with SessionLocal() as db:
-                log_event(
-                    db=db,
-                    user_id=user_id, 
-                    status_code=response.status_code,
-                    method=request.method,
-                    duration_ms=duration_ms,
-                    meta=meta,
-                )
-                db.commit()
+            queue_event(
+                user_id=user_id,
+                status_code=status_code,
+                method=scope["method"],
+                duration_ms=duration_ms,
+                meta=filters(**meta),
+                sample_weight=weight,
+            )
         except Exception:
             pass
 
-        return response
\ No newline at end of file
+    @staticmethod
+    def route_template(scope: Scope) -> str:
+        """The matched route's path template (e.g. `/books/{book_id}`), so metrics stay low-cardinality."""
+        return getattr(scope.get("route"), "path", None) or "<unmatched>"
@@ -7,7 +7,7 @@ This file defines the API endpoints for user authentication and self-service.
 Endpoints:
 - POST /auth/signup → Create a new user (no login required, defaults to 'member' role)
 - POST /auth/login  → Authenticate a user and return a JWT token
-- GET /auth/me      → Fetch the currently logged-in user's details
+- GET /auth/me      → Fetch the currently logged-in user's details (include/nested_limit/active_loans_only)
 
 Notes:
 - JWT-based authentication using OAuth2PasswordRequestForm for login.
@@ -20,11 +20,11 @@ from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import NestedCollections, get_current_user, get_uow
 from app.db import get_db
 from app.db.models import User
 from app.schemas import SignupUser, ShowUser
-from app.services import auth
+from app.services import auth, crud_user
 
 router = APIRouter(
     prefix="/auth",
@@ -33,21 +33,21 @@ router = APIRouter(
 
 
 @router.post("/signup", response_model=ShowUser, status_code=status.HTTP_201_CREATED)
-def create_user(payload: SignupUser, db: Session = Depends(get_db)) -> Any:
+def create_user(payload: SignupUser, db: Session = Depends(get_uow)) -> Any:
     """Register a new user (defaults to role=member). Logs the creation event."""
     created = auth.register(db, obj_in=payload)
-    return created
+    return crud_user.load_collections(db, [created], schema=ShowUser, plan={}, limit=0)[0]
 
 
 @router.post("/login")
-def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
-    """Authenticate user via OAuth2 form and return JWT. Logs login event."""
-    logged = auth.login(form_data, db)
-    print("check")
+async def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
+    """Authenticate user via OAuth2 form and return JWT. Logs login event. Password checks run off the event loop."""
+    logged = await auth.login(form_data, db)
     return logged
 
 
 @router.get("/me", response_model=ShowUser)
-def get_current_user_info(current_user: User = Depends(get_current_user)) -> Any:
-    """Get the currently logged-in user's details."""
-    return current_user
+def get_current_user_info(nested: NestedCollections = Depends(), db: Session = Depends(get_db),
+                          current_user: User = Depends(get_current_user)) -> Any:
+    """Get the currently logged-in user's details, with bounded loans/events (see `nested`)."""
+    return crud_user.load_collections(db, [current_user], schema=ShowUser, plan=nested.plan(), limit=nested.limit)[0]
@@ -7,26 +7,31 @@ def Update an existing book's details (admin/librarian only). Logs the update ev
 
 Endpoints:
 - GET /books/        → List books with optional filters (id, title, author, year, genre, copies)
+                       or full-text search (`q`, ranked, prefix match on every word)
 - POST /books/       → Create a new book (admin/librarian only)
+- POST /books/import → Bulk import a CSV or NDJSON upload (admin/librarian only)
 - PUT /books/{id}  → Update book details (admin/librarian only)
 - DELETE /books/{id} → Delete a book (admin/librarian only)
 
 Notes:
 - Admin/librarian actions require authentication and role checks.
-- Database sessions are provided via `Depends(get_db)`.
+- Database sessions are provided via `Depends(get_db)`; write endpoints use `Depends(get_uow)` (one commit per request).
 """
 
-from typing import List
+import codecs
+import csv
+import json
+from typing import Iterator, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 
 from app import utils
-from app.api.deps import require_roles
-from app.core.enums import UserRole
+from app.api.deps import NestedCollections, Pagination, require_roles, get_uow
+from app.core.enums import FileFormat, UserRole
 from app.db import get_db
 from app.db.models import User
-from app.schemas import CreateBook, UpdateBook, ShowBook
+from app.schemas import BookImportReport, CreateBook, UpdateBook, ShowBook
 from app.services import crud_book as book
 
 router = APIRouter(
@@ -37,14 +42,21 @@ router = APIRouter(
 
 @router.get("/", response_model=List[ShowBook])
 def list_books(
+        q: str | None = None,
         id: int | None = None,
         title: str | None = None,
         author: str | None = None,
         published_year: str | None = None,
         genre: str | None = None,
         total_copies: int | None = None,
+        page: Pagination = Depends(),
+        nested: NestedCollections = Depends(),
         db: Session = Depends(get_db), ):
-    """List books with optional filters. Logs a search event."""
+    """
+    List books with optional filters, one keyset page at a time.
+    `q` runs a ranked full-text search over title, author and genre, best matches first (also paged by cursor).
+    Embedded loans are bounded by `nested`.
+    """
 
     filters = utils.filters(
         id=id,
@@ -55,21 +67,61 @@ def list_books(
         total_copies=total_copies
     )
 
-    searched = book.list_like(db, **filters)
-    return searched
+    if q:
+        books = page(book.search(db, q, limit=page.limit, after=page.after, **filters))
+    else:
+        books = page(book.list_page(db, limit=page.limit, after=page.after, **filters))
+    return book.load_collections(db, books, schema=ShowBook, plan=nested.plan(), limit=nested.limit)
 
 
 @router.post("/", response_model=ShowBook)
-def create_book(payload: CreateBook, db: Session = Depends(get_db),
+def create_book(payload: CreateBook, db: Session = Depends(get_uow),
                 current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
     """Create a new book (admin/librarian only). Logs the creation event."""
 
     created = book.create(db, obj_in=payload)
-    return created
+    # A new book has no loans: embed the empty collections without a lazy load.
+    return book.load_collections(db, [created], schema=ShowBook, plan={}, limit=0)[0]
+
+
+def _upload_rows(upload: UploadFile, fmt: FileFormat) -> Iterator[dict | ValueError]:
+    """
+    Decode an uploaded CSV/NDJSON file row by row (blank CSV cells become None, bad JSON lines a ValueError).
+    Bytes that are not UTF-8 end the file: a ValueError takes the place of the row they are in.
+    """
+    try:
+        yield from _decoded_rows(codecs.getreader("utf-8-sig")(upload.file), fmt)
+    except UnicodeDecodeError as e:
+        yield ValueError(f"not UTF-8 ({e.reason}); the rest of the file was skipped")
+
+
+def _decoded_rows(lines: Iterator[str], fmt: FileFormat) -> Iterator[dict | ValueError]:
+    if fmt == FileFormat.CSV:
+        for row in csv.DictReader(lines):
+            yield {key: (value if value != "" else None) for key, value in row.items()}
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield ValueError(f"invalid JSON: {e.msg}")
+
+
+@router.post("/import", response_model=BookImportReport)
+def import_books(file: UploadFile = File(...), format: FileFormat | None = None, db: Session = Depends(get_db),
+                 current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+    """
+    Bulk import books from a CSV (with a header row) or NDJSON upload (admin/librarian only).
+    The format defaults from the file extension. Returns counts plus per-row errors.
+    """
+    if format is None:
+        format = FileFormat.CSV if (file.filename or "").lower().endswith(".csv") else FileFormat.NDJSON
+    return book.bulk_import(db, _upload_rows(file, format))
 
 
 @router.put("/{book_id}", response_model=ShowBook)
-def update_book(book_id: int, payload: UpdateBook, db: Session = Depends(get_db),
+def update_book(book_id: int, payload: UpdateBook, nested: NestedCollections = Depends(), db: Session = Depends(get_uow),
                 current_user: User = Depends(require_roles(UserRole.ADMIN))):
     """Update an existing book’s details (admin only). Logs the update event."""
 
@@ -78,11 +130,11 @@ def update_book(book_id: int, payload: UpdateBook, db: Session = Depends(get_db)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
     updated = book.update(db, db_obj=obj, obj_in=payload)
-    return updated
+    return book.load_collections(db, [updated], schema=ShowBook, plan=nested.plan(), limit=nested.limit)[0]
 
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_book(book_id: int, db: Session = Depends(get_db),
+def delete_book(book_id: int, db: Session = Depends(get_uow),
                 current_user: User = Depends(require_roles(UserRole.ADMIN))):
     """Delete a book by ID (admin only). Logs the deletion event."""
 
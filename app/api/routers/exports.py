@@ -0,0 +1,97 @@
+"""
+Exports Router
+--------------
+
+Streaming dumps for reporting. Rows are read from the database in chunks and
+written to the client as they are encoded, so memory use does not grow with
+the number of rows.
+
+Endpoints:
+- GET /exports/books   → Books (title, author, genre, published_year filters)
+- GET /exports/loans   → Loans (user_id, book_id, active_only, borrow-date range)
+- GET /exports/users   → Users without password hashes (is_active, role, join-date range) — admin only
+- GET /exports/events  → Events (user_id, method, status_code, timestamp range) — admin only
+
+Notes:
+- `format=ndjson` (default) or `format=csv`.
+- Ranges are half-open: `since` inclusive, `until` exclusive.
+- Each export opens its own session, since the response outlives the request's `get_db` session.
+"""
+
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.api.deps import require_role, require_roles
+from app.core.enums import FileFormat, UserRole
+from app.db.models import User
+from app.services import export
+
+router = APIRouter(
+    prefix="/exports",
+    tags=['Exports']
+)
+
+
+def _streaming(name: str, stmt: Select, fmt: FileFormat) -> StreamingResponse:
+    return StreamingResponse(
+        export.stream(stmt, fmt),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+    )
+
+
+@router.get("/books")
+def export_books(
+        format: FileFormat = FileFormat.NDJSON,
+        title: str | None = None,
+        author: str | None = None,
+        genre: str | None = None,
+        published_year: int | None = None,
+        current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+    """Stream the book catalog (admin/librarian only)."""
+    stmt = export.books_query(title=title, author=author, genre=genre, published_year=published_year)
+    return _streaming("books", stmt, format)
+
+
+@router.get("/loans")
+def export_loans(
+        format: FileFormat = FileFormat.NDJSON,
+        user_id: int | None = None,
+        book_id: int | None = None,
+        active_only: bool = False,
+        since: date | None = None,
+        until: date | None = None,
+        current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+    """Stream loans, optionally within a borrow-date range (admin/librarian only)."""
+    stmt = export.loans_query(user_id=user_id, book_id=book_id, since=since, until=until, active_only=active_only)
+    return _streaming("loans", stmt, format)
+
+
+@router.get("/users")
+def export_users(
+        format: FileFormat = FileFormat.NDJSON,
+        is_active: bool | None = None,
+        role: UserRole | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        current_user: User = Depends(require_role(UserRole.ADMIN))):
+    """Stream users without password hashes, optionally within a join-date range (admin only)."""
+    stmt = export.users_query(is_active=is_active, role=role, since=since, until=until)
+    return _streaming("users", stmt, format)
+
+
+@router.get("/events")
+def export_events(
+        format: FileFormat = FileFormat.NDJSON,
+        user_id: int | None = None,
+        method: str | None = None,
+        status_code: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        current_user: User = Depends(require_role(UserRole.ADMIN))):
+    """Stream request events, optionally within a timestamp range (admin only)."""
+    stmt = export.events_query(user_id=user_id, method=method, status_code=status_code, since=since, until=until)
+    return _streaming("events", stmt, format)
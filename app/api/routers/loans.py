@@ -8,13 +8,16 @@ Endpoints:
 - GET /loans/         → List loans with optional filters (book_id, member_id, borrow/return dates)
 - POST /loans/        → Create a new loan (admin/librarian only, checks book availability)
 - GET /loans/active   → Get active loan for a user/book combination
+- GET /loans/overdue  → Overdue loans, longest overdue first, optionally for one user (admin/librarian only)
 - PUT /loans/return/{id} → Return a book by loan ID
+- POST /loans/batch/checkout → Check out many (user, book) pairs in one transaction (admin/librarian only)
+- POST /loans/batch/return   → Return many loans in one transaction (admin/librarian only)
 - PUT /loans/{id}   → Update loan details (admin/librarian only)
 - DELETE /loans/{id}  → Delete a loan (admin/librarian only)
 
 Notes:
 - Admin/librarian actions require authentication and role checks.
-- Database sessions are provided via `Depends(get_db)`.
+- Database sessions are provided via `Depends(get_db)`; write endpoints use `Depends(get_uow)` (one commit per request).
 """
 
 from datetime import date
@@ -25,10 +28,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.enums import UserRole
-from app.schemas import CreateLoan, UpdateLoan, ShowLoan
+from app.schemas import BatchCheckout, BatchLoanReport, BatchReturn, CreateLoan, UpdateLoan, ShowLoan
 from app.db.models import Book, User
 from app.services import crud_book, crud_loan as loan
-from app.api.deps import require_roles
+from app.api.deps import Pagination, require_roles, get_uow
 from app import utils
 from app.db import get_db
 
@@ -44,6 +47,7 @@ def list_loans(
         due_date: date | None = None,
         member_id: int | None = None,
         return_date: date | None = None,
+        page: Pagination = Depends(),
         db: Session = Depends(get_db),
         current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
     """List loans with optional filters (admin/librarian only)."""
@@ -57,12 +61,10 @@ def list_loans(
         return_date=return_date,
     )
    
-    searched = loan.list_like(db, **filters)
-        
-    return searched
+    return page(loan.list_page(db, limit=page.limit, after=page.after, **filters))
 
 @router.post("/", response_model=ShowLoan, status_code=status.HTTP_201_CREATED)
-def create_loan(payload: CreateLoan, db: Session = Depends(get_db), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+def create_loan(payload: CreateLoan, db: Session = Depends(get_uow), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
     """Create a new loan (admin/librarian only). Checks book availability."""
     book_obj = crud_book.get(db, payload.book_id)
     if not book_obj:
@@ -70,33 +72,60 @@ def create_loan(payload: CreateLoan, db: Session = Depends(get_db), current_user
     if book_obj.available_copies <= 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No available copies for this book")
     created = loan.create_checkout(db, user_id=payload.user_id, book_id=payload.book_id)
+    if created is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="No available copies for this book, or the user already has it on loan")
     return created
 
+@router.post("/batch/checkout", response_model=BatchLoanReport)
+def checkout_batch(payload: BatchCheckout, db: Session = Depends(get_uow), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+    """Check out many (user, book) pairs in one transaction (admin/librarian only). Reports each item's outcome."""
+    return loan.checkout_many(db, payload.items, loan_days=payload.loan_days)
+
+@router.post("/batch/return", response_model=BatchLoanReport)
+def return_batch(payload: BatchReturn, db: Session = Depends(get_uow), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+    """Return many loans in one transaction (admin/librarian only). Reports each loan's outcome."""
+    return loan.return_many(db, payload.loan_ids)
+
 @router.put("/return/{loan_id}", response_model=ShowLoan)
-def return_book(loan_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+def return_book(loan_id: int, db: Session = Depends(get_uow), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
     """Return a book by loan ID."""
     obj = loan.get(db, id=loan_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Loan not found")
-    return loan.return_book(db, loan_id)
+    returned = loan.return_book(db, loan_id)
+    if returned is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Loan already returned")
+    return returned
 
 @router.get("/active", response_model=List[ShowLoan])
 def get_active_loans(
     user_id: int | None = None,
     book_id: int | None = None,
+    page: Pagination = Depends(),
     db: Session = Depends(get_db), 
     current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))
 ):
     """Get all active loans, optionally filtered by user_id."""
     if user_id:
-        active_loans = loan.get_user_loans(db, user_id=user_id, active_only=True)
+        active_loans = loan.list_user_loans(db, user_id=user_id, active_only=True, limit=page.limit, after=page.after)
     else:
-        active_loans = loan.get_active_loan(db, book_id=book_id)
+        active_loans = loan.paginate(loan.query_active(db, book_id=book_id), limit=page.limit, after=page.after)
     
-    return active_loans
+    return page(active_loans)
+
+@router.get("/overdue", response_model=List[ShowLoan])
+def get_overdue_loans(
+    user_id: int | None = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))
+):
+    """Overdue loans, longest overdue first, optionally filtered by user_id (refreshed when the date changes)."""
+    return page(loan.list_overdue(db, user_id=user_id, limit=page.limit, after=page.after))
 
 @router.put("/{loan_id}", response_model=ShowLoan)
-def update_loan(loan_id: int, payload: UpdateLoan, db: Session = Depends(get_db), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+def update_loan(loan_id: int, payload: UpdateLoan, db: Session = Depends(get_uow), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
     """Update loan details (admin/librarian only)."""
     obj = loan.get(db, id=loan_id)
     if not obj:
@@ -106,7 +135,7 @@ def update_loan(loan_id: int, payload: UpdateLoan, db: Session = Depends(get_db)
     return updated
 
 @router.delete("/{loan_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_loan(loan_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
+def delete_loan(loan_id: int, db: Session = Depends(get_uow), current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.LIBRARIAN]))):
     """Delete a loan by ID (admin/librarian only)."""
     obj = loan.get(db, id=loan_id)
     if not obj:
@@ -0,0 +1,25 @@
+"""
+Metrics Router
+--------------
+
+Endpoints:
+- GET /metrics → Request latency histograms, in-flight requests, DB pool and background-worker
+                 gauges in the Prometheus text format (see app.core.metrics)
+
+Notes:
+- Served straight from memory on the event loop; no database access, no authentication
+  (expose it only on the internal network, as usual for scrape targets).
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+
+router = APIRouter(tags=['Metrics'])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -9,6 +9,10 @@ Endpoints:
 - POST /orders/        → Create a new book order (member+)
 - PUT /orders/{id}   → Update order details (admin/librarian only)
 - DELETE /orders/{id}  → Cancel/delete an order (owner or admin/librarian)
+- GET /orders/{id}/position → Place of a waiting order in its book's queue (owner or admin/librarian)
+- GET /orders/waiting/{book_id} → Waiting list for a book, in queue order (librarian+)
+
+Returning a loan hands the copy to the head of the book's waiting list (the order becomes FULFILLED).
 
 Notes:
 - Admin/Librarian actions require authentication and role checks.
@@ -20,7 +24,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, require_role
+from app.api.deps import Pagination, get_current_user, require_role, get_uow
 from app.core.enums import UserRole
 from app.db import get_db
 from app.db.models import User
@@ -36,22 +40,18 @@ router = APIRouter(
 @router.get("/", response_model=List[ShowBookOrder])
 def list_orders(
         user_id: int | None = None,
+        page: Pagination = Depends(),
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)):
-    """List orders. Users see only their orders, admin/librarian can see all."""
+    """List orders, newest first. Users see only their orders, admin/librarian can see all."""
     if current_user.role not in [UserRole.ADMIN, UserRole.LIBRARIAN]:
-        orders = order.get_user_orders(db, user_id=current_user.id)
-    else:
-        if user_id:
-            orders = order.get_user_orders(db, user_id=user_id)
-        else:
-            orders = db.query(order.model).all()
+        user_id = current_user.id
 
-    return orders
+    return page(order.list_orders(db, user_id=user_id, limit=page.limit, after=page.after))
 
 
 @router.post("/", response_model=ShowBookOrder, status_code=status.HTTP_201_CREATED)
-def create_order(payload: CreateBookOrder, db: Session = Depends(get_db),
+def create_order(payload: CreateBookOrder, db: Session = Depends(get_uow),
                  current_user: User = Depends(get_current_user)):
     """Create a new book order (join waiting list)."""
     try:
@@ -70,7 +70,7 @@ def create_order(payload: CreateBookOrder, db: Session = Depends(get_db),
 
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_order(order_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete_order(order_id: int, db: Session = Depends(get_uow), current_user: User = Depends(get_current_user)):
     """Delete/cancel an order by ID. Users can only cancel their own orders."""
     if current_user.role not in [UserRole.ADMIN, UserRole.LIBRARIAN]:
         try:
@@ -114,11 +114,27 @@ def get_waiting_list(
     }
 
 
+@router.get("/{order_id}/position")
+def get_order_position(order_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Position of an order in its book's waiting list (null once fulfilled or cancelled). Users can only see their own."""
+    obj = order.get(db, id=order_id)
+    if not obj or (current_user.role not in [UserRole.ADMIN, UserRole.LIBRARIAN] and obj.user_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+
+    return {
+        "order_id": obj.id,
+        "book_id": obj.book_id,
+        "status": obj.status,
+        "position": order.position(db, obj),
+        "total_waiting": order.count_waiting(db, obj.book_id),
+    }
+
+
 @router.get("/my-orders")
 def get_my_orders(
+        page: Pagination = Depends(),
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    """Get current user's orders."""
-    orders = order.get_user_orders(db, user_id=current_user.id)
-    return orders
+    """Get current user's orders, newest first."""
+    return page(order.list_orders(db, user_id=current_user.id, limit=page.limit, after=page.after))
@@ -21,7 +21,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app import utils
-from app.api.deps import require_role
+from app.api.deps import NestedCollections, Pagination, require_role, get_uow
 from app.core.enums import UserRole
 from app.db import get_db
 from app.db.models import User
@@ -41,8 +41,10 @@ def list_users(
         email: str | None = None,
         phone_number: str | None = None,
         address: str | None = None,
+        page: Pagination = Depends(),
+        nested: NestedCollections = Depends(),
         db: Session = Depends(get_db), current_user: User = Depends(require_role(UserRole.ADMIN))):
-    """List users with optional filters (admin only)."""
+    """List users with optional filters (admin only). Embedded loans/events are bounded by `nested`."""
 
     filters = utils.filters(
         id=id,
@@ -51,22 +53,21 @@ def list_users(
         phone_number=phone_number,
         address=address,
     )
-    searched = user.list_like(db, **filters)
+    users = page(user.list_page(db, limit=page.limit, after=page.after, **filters))
+    return user.load_collections(db, users, schema=ShowUser, plan=nested.plan(), limit=nested.limit)
 
-    return searched
 
-
-@router.post("/", response_model=List[ShowUser])
-def create_user(payload: CreateUser, db: Session = Depends(get_db),
+@router.post("/", response_model=ShowUser)
+def create_user(payload: CreateUser, db: Session = Depends(get_uow),
                 current_user: User = Depends(require_role(UserRole.ADMIN))) -> Any:
     """Create a new user (admin only). Logs the creation event."""
     created = user.create(db, obj_in=payload)
-
-    return created
+    # A new user has no loans or events: embed the empty collections without a lazy load.
+    return user.load_collections(db, [created], schema=ShowUser, plan={}, limit=0)[0]
 
 
 @router.put("/{user_id}", response_model=ShowUser)
-def update_user(user_id: int, payload: UpdateUser, db: Session = Depends(get_db),
+def update_user(user_id: int, payload: UpdateUser, nested: NestedCollections = Depends(), db: Session = Depends(get_uow),
                 current_user: User = Depends(require_role(UserRole.ADMIN))):
     """Update user details (admin only). Prevents role escalation."""
     obj = user.get(db, user_id)
@@ -77,11 +78,11 @@ def update_user(user_id: int, payload: UpdateUser, db: Session = Depends(get_db)
     if payload.role == UserRole.ADMIN and obj.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Admin")
     updated = user.update(db, db_obj=obj, obj_in=payload)
-    return updated
+    return user.load_collections(db, [updated], schema=ShowUser, plan=nested.plan(), limit=nested.limit)[0]
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_User(user_id: int, db: Session = Depends(get_db),
+def delete_User(user_id: int, db: Session = Depends(get_uow),
                 current_user: User = Depends(require_role(UserRole.ADMIN))):
     """Delete a user (admin only). Restricted by role rules."""
     obj = user.get(db, user_id)
@@ -0,0 +1,124 @@
+"""
+Command-line maintenance tasks.
+
+Usage:
+    python -m app.cli rebuild-counters   → Recompute the statistics counters and the overdue-loan set from scratch.
+    python -m app.cli prune-events       → Roll up complete hours of events, then delete raw events past retention.
+    python -m app.cli check-query-plans  → EXPLAIN the service layer's hot queries; exit 1 if any scans a whole table.
+    python -m app.cli generate-data      → Fill an empty database with a seeded synthetic dataset (production sizes by default).
+"""
+
+import argparse
+import sys
+import time
+
+from app.db.session import Base, SessionLocal, engine
+from app.core.config import settings
+from app.services import counters, overdue, retention, synthetic
+
+
+def rebuild_counters(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        totals = counters.rebuild(db)
+        print(f"overdue_loans={counters.overdue(db)}")
+        refreshed = overdue.refresh(db)
+        print(f"overdue_set_added={refreshed['added']} overdue_set_removed={refreshed['removed']}")
+    for name, value in totals.items():
+        print(f"{name}={value}")
+
+
+def prune_events(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        print(f"rolled_up={retention.roll_up(db)}")
+        print(f"deleted={retention.prune(db, chunk_size=args.chunk_size)}")
+        print(f"rolled_up_through={retention.rolled_up_through(db)}")
+
+
+def check_query_plans(args: argparse.Namespace) -> None:
+    from app.services import query_plans
+
+    results = query_plans.check()
+    for result in results:
+        print(f"{'ok  ' if result.ok else 'SCAN'} {result.name}")
+        if args.verbose or not result.ok:
+            for statement, plan in result.plans:
+                print(f"       {' '.join(statement.split())}")
+                for line in plan:
+                    print(f"         {line}")
+    failed = sum(not result.ok for result in results)
+    print(f"{len(results) - failed} ok, {failed} with full table scans")
+    if failed:
+        sys.exit(1)
+
+
+def generate_data(args: argparse.Namespace) -> None:
+    from app.core.security import get_password_hash
+    from app.db.session import make_engine
+
+    spec = synthetic.DatasetSpec(seed=args.seed, days=args.days, event_days=args.event_days, open_ratio=args.open_ratio,
+                       overdue_ratio=args.overdue_ratio, book_skew=args.book_skew,
+                       chunk_size=args.chunk_size).scaled(args.scale)
+    for name in synthetic.DatasetSpec.SIZES:
+        if getattr(args, name) is not None:
+            setattr(spec, name, getattr(args, name))
+    started = {}
+
+    def progress(table: str, done: int, total: int) -> None:
+        started.setdefault(table, time.perf_counter())
+        if done and (done == total or done % (args.chunk_size * 20) == 0):
+            elapsed = time.perf_counter() - started[table]
+            print(f"{table}: {done}/{total} ({done / elapsed if elapsed else 0:,.0f} rows/s)", flush=True)
+
+    bulk_engine = make_engine(settings.SQLALCHEMY_DATABASE_URL, profile=args.profile)
+    start = time.perf_counter()
+    try:
+        loaded = synthetic.generate(bulk_engine, spec, get_password_hash(args.password), progress)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    finally:
+        bulk_engine.dispose()
+    for table, rows in loaded.items():
+        print(f"{table}={rows}")
+    print(f"seconds={time.perf_counter() - start:.1f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Library maintenance tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-counters", help="Recompute the statistics counters and overdue set from the source tables")
+    rebuild.set_defaults(func=rebuild_counters)
+
+    prune = commands.add_parser("prune-events", help="Roll up events into hourly aggregates and delete old raw rows")
+    prune.add_argument("--chunk-size", type=int, default=settings.EVENT_RETENTION_CHUNK_SIZE,
+                       help="raw rows deleted per transaction")
+    prune.set_defaults(func=prune_events)
+
+    plans = commands.add_parser("check-query-plans",
+                                help="Fail if a hot service query scans a whole table (runs on a scratch database)")
+    plans.add_argument("-v", "--verbose", action="store_true", help="print every statement and its plan")
+    plans.set_defaults(func=check_query_plans)
+
+    data = commands.add_parser("generate-data", help="Fill an empty database with a seeded synthetic dataset")
+    data.add_argument("--scale", type=float, default=1.0,
+                      help="multiply the default sizes (1M books, 200k users, 10M loans, 500k orders, 50M events)")
+    for name in synthetic.DatasetSpec.SIZES:
+        data.add_argument(f"--{name}", type=int, help=f"number of {name} (overrides --scale)")
+    data.add_argument("--seed", type=int, default=42, help="same seed and sizes, same rows")
+    data.add_argument("--days", type=int, default=730, help="history covered by returned loans and past orders")
+    data.add_argument("--event-days", type=int, default=14, help="period covered by request events")
+    data.add_argument("--open-ratio", type=float, default=0.05, help="share of loans still open")
+    data.add_argument("--overdue-ratio", type=float, default=0.2, help="share of open loans past due")
+    data.add_argument("--book-skew", type=float, default=1.1, help="Zipf exponent of book popularity")
+    data.add_argument("--password", default="password", help="password of every generated account")
+    data.add_argument("--chunk-size", type=int, default=50_000, help="rows per executemany and transaction")
+    data.add_argument("--profile", default="bulk-load", help="DB_PROFILES entry used for the load")
+    data.set_defaults(func=generate_data)
+
+    args = parser.parse_args(argv)
+    Base.metadata.create_all(bind=engine)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
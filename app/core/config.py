@@ -1,3 +1,6 @@
+import os
+from typing import Any
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +10,105 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     SQLALCHEMY_DATABASE_URL: str = 'sqlite:///./library.db'
 
+    # SQLite engine profile (see app.db.session): PRAGMAs run on every new connection,
+    # pool settings go to create_engine. WAL lets readers run alongside the single writer,
+    # busy_timeout makes writers from other workers wait instead of failing with "database is locked".
+    DB_PROFILE: str = "dev"
+    DB_PROFILES: dict[str, dict[str, dict[str, Any]]] = {
+        "dev": {
+            "pragmas": {"busy_timeout": 5_000, "journal_mode": "WAL", "synchronous": "NORMAL",
+                        "cache_size": -16_000},
+            "pool": {"pool_size": 5, "max_overflow": 10},
+        },
+        "production": {
+            "pragmas": {"busy_timeout": 15_000, "journal_mode": "WAL", "synchronous": "NORMAL",
+                        "cache_size": -64_000, "mmap_size": 268_435_456, "temp_store": "MEMORY"},
+            "pool": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30},
+        },
+        "bulk-load": {
+            "pragmas": {"busy_timeout": 60_000, "journal_mode": "WAL", "synchronous": "OFF",
+                        "cache_size": -262_144, "mmap_size": 1_073_741_824, "temp_store": "MEMORY",
+                        "wal_autocheckpoint": 10_000},
+            "pool": {"pool_size": 2, "max_overflow": 0},
+        },
+    }
+
+    # Per-request SQL accounting (app.db.session hooks → X-DB-Queries / X-DB-Time headers).
+    # Budgets are keyed by route template, with or without the method ("GET /books/{book_id}",
+    # "/books/{book_id}"); routes without one get DB_QUERY_BUDGET_DEFAULT (0 = unlimited). A
+    # SELECT run with DB_REPEATED_QUERY_LIMIT or more different parameters is an N+1 (0 disables).
+    # Problems are logged; with DB_QUERY_STRICT the response becomes a 500, so tests fail.
+    DB_QUERY_BUDGET_DEFAULT: int = 0
+    DB_QUERY_BUDGETS: dict[str, int] = {
+        "GET /books/": 3, "GET /users/": 5, "GET /auth/me": 3, "GET /loans/": 2, "GET /loans/overdue": 2,
+        "GET /orders/waiting/{book_id}": 3, "GET /statistics/overview": 3,
+    }
+    DB_REPEATED_QUERY_LIMIT: int = 10
+    DB_QUERY_STRICT: bool = False
+
+    # Request event logging (ResponseTimeMiddleware → EventBuffer)
+    EVENT_BUFFER_SIZE: int = 10_000
+    EVENT_BATCH_SIZE: int = 500
+    EVENT_FLUSH_INTERVAL_MS: int = 1_000
+
+    # Request event capture (app.services.event.CaptureRules). Rules match a path ("/books/")
+    # or a prefix ("/books/*"), optionally for one method ("GET /books/*"); the most specific
+    # rule wins. EVENT_NEVER_CAPTURE is never logged; responses with status >= EVENT_CAPTURE_STATUS_MIN
+    # or slower than EVENT_CAPTURE_SLOW_MS always are (0 disables either). Everything else is
+    # kept with its EVENT_SAMPLE_RATES rate (default EVENT_SAMPLE_RATE) and stored with
+    # sample_weight = 1 / rate, so summing weights estimates the real request count.
+    EVENT_SAMPLE_RATE: float = 1.0
+    EVENT_SAMPLE_RATES: dict[str, float] = {}
+    EVENT_NEVER_CAPTURE: list[str] = []
+    EVENT_CAPTURE_STATUS_MIN: int = 400
+    EVENT_CAPTURE_SLOW_MS: int = 1_000
+
+    # Event retention (app.services.retention): raw events are rolled up into hourly
+    # `event_rollups`, then deleted in chunks once older than EVENT_RETENTION_DAYS.
+    # Hours are rolled up EVENT_ROLLUP_LAG_SECONDS after they end (buffered events land first);
+    # the background job runs every EVENT_RETENTION_INTERVAL_SECONDS (0 = only via the CLI).
+    EVENT_RETENTION_DAYS: int = 30
+    EVENT_ROLLUP_LAG_SECONDS: int = 300
+    EVENT_RETENTION_CHUNK_SIZE: int = 5_000
+    EVENT_RETENTION_INTERVAL_SECONDS: int = 3_600
+
+    # Overdue-loan set (app.services.overdue): how often the background job checks whether
+    # the date has changed and newly overdue loans need adding (0 = only via the CLI)
+    OVERDUE_CHECK_INTERVAL_SECONDS: int = 60
+
+    # Authenticated-user cache (get_current_user)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
+
+    # Statistics result cache: seconds per endpoint (overview, books, users, operations)
+    STATS_CACHE_TTLS: dict[str, float] = {"overview": 30, "books": 300, "users": 300, "operations": 60}
+
+    # Nested collections (loans/events) embedded in user and book responses
+    NESTED_LIMIT_DEFAULT: int = 20
+    NESTED_LIMIT_MAX: int = 500
+
+    # Streaming exports: rows fetched from the cursor per round trip
+    EXPORT_CHUNK_SIZE: int = 1_000
+
+    # Bulk catalog import: rows per validated/inserted transaction, and errors reported back
+    IMPORT_CHUNK_SIZE: int = 5_000
+    IMPORT_MAX_ERRORS: int = 1_000
+
+    # Keyset pagination on list endpoints
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+
+    # Batch checkout/return: items per request (one transaction)
+    LOAN_BATCH_MAX: int = 1_000
+    # Days from checkout until a loan is due (single, batch and waiting-list checkouts)
+    LOAN_DAYS: int = 30
+
+    # Password hashing: bcrypt cost (stored hashes at another cost are upgraded on login),
+    # worker processes (0 = hash inline), and jobs submitted to the pool at once
+    BCRYPT_ROUNDS: int = 12
+    HASH_POOL_SIZE: int = min(4, os.cpu_count() or 1)
+    HASH_MAX_PENDING: int = 64
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
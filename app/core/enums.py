@@ -24,6 +24,16 @@ class ObjectType(str, Enum):
     LOAN = "loan"
 
 
+class NestedCollection(str, Enum):
+    LOANS = "loans"
+    EVENTS = "events"
+
+
+class FileFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class OrderStatus(str, Enum):
     WAITING = "waiting"
     FULFILLED = "fulfilled"
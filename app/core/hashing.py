@@ -0,0 +1,168 @@
+"""
+Password Hashing
+----------------
+
+bcrypt runs in a dedicated process pool so a burst of logins cannot tie up the
+event loop or the request threadpool.
+
+- `PasswordHasher` → size-limited process pool plus a cap on jobs queued for it
+- `hasher`         → module instance configured from `Settings`
+
+At most `HASH_MAX_PENDING` jobs are submitted at once; further callers wait for a
+slot. Queue time in `stats()` runs from the call until a worker picks the job up,
+so it covers both the wait for a slot and the backlog inside the pool. `HASH_POOL_SIZE = 0`
+hashes inline in the calling thread instead (no pool).
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import anyio.to_thread
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def password_context(rounds: int) -> CryptContext:
+    """bcrypt context at `rounds`; hashes at any other cost verify but need an update."""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return password_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return password_context(rounds).verify_and_update(password, hashed)
+
+
+def _timed(fn, *args) -> Tuple[float, Any]:
+    """Run `fn` in a pool worker, also returning when it started (wall clock, comparable across processes)."""
+    return time.time(), fn(*args)
+
+
+class PasswordHasher:
+    def __init__(self, *, pool_size: int, max_pending: int, rounds: int):
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: ProcessPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots = weakref.WeakKeyDictionary()  # event loop → asyncio.Semaphore(max_pending)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """Start the pool (also done lazily); `loop` is the app's event loop that sync callers go through."""
+        with self._lock:
+            if loop is not None:
+                self._loop = loop
+            if self._executor is None and self.pool_size > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.pool_size, mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor, self._loop = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(_hash, password, self.rounds)
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash): `new_hash` is set when the stored hash uses another cost and should be replaced."""
+        return await self._run_async(_verify_and_update, password, hashed, self.rounds)
+
+    def hash(self, password: str) -> str:
+        """Blocking `hash_async`, for sync code (request threadpool, CLI)."""
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "max_pending": self.max_pending,
+                "waiting": self.waiting,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "queue_time_ms_total": round(self.queue_time_total * 1000, 3),
+                "queue_time_ms_max": round(self.queue_time_max * 1000, 3),
+            }
+
+    async def _run_async(self, fn, *args):
+        if self.pool_size <= 0:
+            return await anyio.to_thread.run_sync(fn, *args)
+        slots = self._slots.get(asyncio.get_running_loop())
+        if slots is None:
+            slots = self._slots.setdefault(asyncio.get_running_loop(), asyncio.Semaphore(self.max_pending))
+        queued = time.time()
+        self._count(waiting=1)
+        try:
+            await slots.acquire()
+        finally:
+            self._count(waiting=-1)
+        try:
+            self._count(in_flight=1)
+            started, result = await asyncio.wrap_future(self._submit(fn, *args))
+        finally:
+            slots.release()
+            self._count(in_flight=-1)
+        self._count(completed=1, waited=started - queued)
+        return result
+
+    def _run(self, fn, *args):
+        if self.pool_size <= 0:
+            return fn(*args)
+        loop = self._loop
+        if loop is not None and loop.is_running() and not self._on_loop(loop):
+            # A request's worker thread: go through the app's event loop and its limit.
+            return asyncio.run_coroutine_threadsafe(self._run_async(fn, *args), loop).result()
+        # No app loop (CLI, scripts): submitted directly.
+        queued = time.time()
+        started, result = self._submit(fn, *args).result()
+        self._count(completed=1, waited=started - queued)
+        return result
+
+    @staticmethod
+    def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _submit(self, fn, *args) -> Future:
+        self.start()
+        return self._executor.submit(_timed, fn, *args)
+
+    def _count(self, *, waiting: int = 0, in_flight: int = 0, completed: int = 0, waited: float | None = None) -> None:
+        with self._lock:
+            self.waiting += waiting
+            self.in_flight += in_flight
+            self.completed += completed
+            if waited is not None:
+                waited = max(waited, 0.0)
+                self.queue_time_total += waited
+                self.queue_time_max = max(self.queue_time_max, waited)
+
+
+hasher = PasswordHasher(
+    pool_size=settings.HASH_POOL_SIZE,
+    max_pending=settings.HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
@@ -0,0 +1,144 @@
+"""
+Metrics
+-------
+
+In-process request metrics rendered in the Prometheus text format (GET /metrics).
+
+- http_request_duration_seconds → fixed-bucket histogram per (route template, method, status class)
+- http_requests_in_flight       → requests currently inside the app
+- db_pool_checkouts_total       → connections handed out by the engine's pool
+- db_pool_checked_out           → connections currently checked out
+- gauges registered with `register_gauge` (event buffer, password hasher, ...)
+
+Histograms are updated from the middleware on the event-loop thread, so observing is a
+bisect plus two increments with no lock; only creating a new series takes one. The DB
+pool counters are bumped from worker threads and use a lock. Rendering walks a few
+small lists, so a scrape costs microseconds.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram family keyed by a label tuple."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}  # labels → [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in list(self._series.items()):
+            series = list(series)
+            base = _labels(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{{{base},le=\"{le}\"}} {cumulative}"
+            yield f"{self.name}_sum{{{base}}} {series[-1]}"
+            yield f"{self.name}_count{{{base}}} {cumulative}"
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template, method and status class.",
+    ("route", "method", "status"),
+)
+requests_in_flight = 0  # only touched from the event loop (ResponseTimeMiddleware)
+db_checkouts = Counter()
+db_checkins = Counter()
+_gauges: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def observe_request(route: str, method: str, status_code: int, seconds: float) -> None:
+    request_latency.observe((route, method, status_class(status_code)), seconds)
+
+
+def track_in_flight(delta: int) -> None:
+    global requests_in_flight
+    requests_in_flight += delta
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count pool checkouts/checkins of `engine` (idempotent)."""
+    if not event.contains(engine, "checkout", _on_checkout):
+        event.listen(engine, "checkout", _on_checkout)
+        event.listen(engine, "checkin", _on_checkin)
+
+
+def register_gauge(name: str, help: str, collect: Callable[[], Dict[str, float]]) -> None:
+    """Expose `collect()` (key → value) at scrape time as gauge `name` with a `key` label; re-registering replaces."""
+    _gauges[name] = (help, collect)
+
+
+def render() -> str:
+    lines = list(request_latency.render())
+    lines += [
+        "# HELP http_requests_in_flight Requests currently being handled.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {requests_in_flight}",
+        "# HELP db_pool_checkouts_total Connections checked out of the database pool.",
+        "# TYPE db_pool_checkouts_total counter",
+        f"db_pool_checkouts_total {db_checkouts.value}",
+        "# HELP db_pool_checked_out Connections currently checked out of the database pool.",
+        "# TYPE db_pool_checked_out gauge",
+        f"db_pool_checked_out {db_checkouts.value - db_checkins.value}",
+    ]
+    for name, (help, collect) in list(_gauges.items()):
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        lines += [f"{name}{{{_labels([('key', key)])}}} {value}" for key, value in collect().items()]
+    return "\n".join(lines) + "\n"
+
+
+def _on_checkout(*args) -> None:
+    db_checkouts.inc()
+
+
+def _on_checkin(*args) -> None:
+    db_checkins.inc()
+
+
+def _labels(pairs) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,64 @@
+"""
+Query Budgets
+-------------
+
+Per-route limits on the SQL one request may run, checked by `ResponseTimeMiddleware`
+against the request's `QueryStats` (app.db.session) when the response starts. That
+covers the endpoint and the teardown of its `yield` dependencies (`get_uow` flushes and
+commits before the response starts), but not what runs afterwards: streaming response
+bodies (exports) and background tasks. COMMIT itself is not a statement and is not counted.
+
+- budget → DB_QUERY_BUDGETS["GET /books/{book_id}"], else DB_QUERY_BUDGETS["/books/{book_id}"],
+           else DB_QUERY_BUDGET_DEFAULT (0 = unlimited)
+- N+1    → one SELECT run with DB_REPEATED_QUERY_LIMIT or more different parameter sets
+
+Problems are logged as warnings. In strict mode (DB_QUERY_STRICT, set for the whole test
+suite in tests/conftest.py) the response is replaced by a 500 listing them, so any test
+that exercises the route fails.
+"""
+
+import json
+from typing import Dict, List, Tuple
+
+from starlette.types import Message
+
+from app.core.config import settings
+from app.db.session import QueryStats, logger
+
+
+class QueryBudgets:
+    """Query budgets per route and the N+1 threshold; `check` turns a request's `QueryStats` into problems."""
+
+    def __init__(self, budgets: Dict[str, int], *, default: int = 0, repeat_limit: int = 0, strict: bool = False):
+        self.budgets = dict(budgets)
+        self.default = default
+        self.repeat_limit = repeat_limit
+        self.strict = strict
+
+    def budget(self, method: str, route: str) -> int:
+        return self.budgets.get(f"{method} {route}", self.budgets.get(route, self.default))
+
+    def check(self, method: str, route: str, stats: QueryStats) -> List[str]:
+        """Problems with the request's SQL (over budget, N+1s); each one is logged."""
+        problems = []
+        budget = self.budget(method, route)
+        if budget and stats.count > budget:
+            problems.append(f"{stats.count} queries, budget {budget}")
+        if self.repeat_limit:
+            for statement, times in stats.repeated(self.repeat_limit).items():
+                problems.append(f"N+1: {times} parameter sets for {' '.join(statement.split())[:300]}")
+        for problem in problems:
+            logger.warning("SQL query budget, %s %s: %s", method, route, problem)
+        return problems
+
+    @staticmethod
+    def rejection(problems: List[str]) -> Tuple[Message, Message]:
+        """Start and body messages of the 500 that replaces a response in strict mode."""
+        body = json.dumps({"detail": "SQL query budget exceeded", "problems": problems}).encode()
+        start = {"type": "http.response.start", "status": 500,
+                 "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]}
+        return start, {"type": "http.response.body", "body": body}
+
+
+query_budgets = QueryBudgets(settings.DB_QUERY_BUDGETS, default=settings.DB_QUERY_BUDGET_DEFAULT,
+                             repeat_limit=settings.DB_REPEATED_QUERY_LIMIT, strict=settings.DB_QUERY_STRICT)
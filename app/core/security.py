@@ -3,10 +3,12 @@ Security
 --------
 
 Password hashing, JWT token creation, and validation.
+Hashing runs in the password-hashing process pool (see app.core.hashing).
 
 Functions:
 - get_password_hash(password)  → hash with bcrypt
 - verify_password(plain, hash) → check password
+- verify_and_update(plain, hash) → check password; new hash if the cost changed
 - create_access_token(data)    → issue JWT with expiry
 - verify_token(token, exc)     → decode JWT and return TokenPayload
 """
@@ -14,22 +16,25 @@ from datetime import datetime, timedelta
 
 from fastapi import HTTPException, status
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.hashing import hasher
 from app.schemas.token import TokenPayload
 
-pwd_cxt = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def get_password_hash(password: str) -> str:
     """Hash a plain password using bcrypt."""
-    return pwd_cxt.hash(password)
+    return hasher.hash(password)
 
 
 def verify_password(plain_password, hashed_password) -> bool:
     """Check if plain password matches the stored hash."""
-    return pwd_cxt.verify(plain_password, hashed_password)
+    return hasher.verify_and_update(plain_password, hashed_password)[0]
+
+
+async def verify_and_update(plain_password, hashed_password) -> tuple[bool, str | None]:
+    """Check a password without blocking the event loop; also returns a rehash when BCRYPT_ROUNDS changed."""
+    return await hasher.verify_and_update_async(plain_password, hashed_password)
 
 
 def create_access_token(subject: str, expires_delta: timedelta | None = None, additional_claims: dict | None = None):
@@ -1,3 +1,3 @@
-from .session import engine, SessionLocal, Base, get_db
+from .session import engine, SessionLocal, Base, get_db, unit_of_work, commit, on_commit
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db"]
+__all__ = ["engine", "SessionLocal", "Base", "get_db", "unit_of_work", "commit", "on_commit"]
@@ -0,0 +1,91 @@
+"""
+Full-text search
+----------------
+
+SQLite FTS5 index over the book catalog (title, author, genre).
+
+`books_fts` is an external-content FTS5 table: it stores only the inverted index
+and reads column values back from `books`. Triggers keep it in sync on every
+INSERT, UPDATE and DELETE against `books`, including writes that bypass the ORM.
+
+Functions:
+- ensure_book_search_index(engine) → Create the index and triggers if missing and backfill it.
+- tokens(text)                     → The words of user input, as the index splits them.
+- match_expression(text)           → Turn user input into a safe FTS5 prefix query.
+"""
+
+import re
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table
+from sqlalchemy.engine import Engine
+
+# Kept out of `Base.metadata`: `create_all` cannot emit virtual tables.
+books_fts = Table(
+    "books_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("title", String),
+    Column("author", String),
+    Column("genre", String),
+    Column("rank", Float),
+)
+
+BOOKS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author, genre,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, genre) VALUES (new.id, new.title, new.author, new.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, genre ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.genre);
+        INSERT INTO books_fts(rowid, title, author, genre) VALUES (new.id, new.title, new.author, new.genre);
+    END
+    """,
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def is_supported(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def ensure_book_search_index(engine: Engine) -> None:
+    """Create `books_fts` and its triggers if they are missing, then backfill from `books`."""
+    if not is_supported(engine):
+        return
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+        ).first()
+        for ddl in BOOKS_FTS_DDL:
+            conn.exec_driver_sql(ddl)
+        if not exists:
+            conn.exec_driver_sql("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text)
+
+
+def match_expression(text: str) -> str | None:
+    """Build an FTS5 query where every word of `text` must match as a prefix (`"dun"* "herb"*`)."""
+    words = tokens(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
@@ -2,9 +2,11 @@
 
 
 from .book import Book
-from .event import Event
+from .counter import LibraryCounter, LoanDueCounter, OverdueLoan
+from .event import Event, EventRollup
 from .loan import Loan
 from .order import BookOrder
 from .user import User
 
-__all__ = ["User", "Book", "Loan", "Event", "BookOrder"]
+__all__ = ["User", "Book", "Loan", "Event", "EventRollup", "BookOrder", "LibraryCounter", "LoanDueCounter",
+           "OverdueLoan"]
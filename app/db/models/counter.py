@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, String, text
+
+from app.db import Base
+
+
+class LibraryCounter(Base):
+    """Running total kept in step by the service layer (see app.services.counters)."""
+    __tablename__ = 'library_counters'
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
+class LoanDueCounter(Base):
+    """Number of open loans (of active users) falling due on each date."""
+    __tablename__ = 'loan_due_counters'
+
+    due_date = Column(Date, primary_key=True)
+    active_loans = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
+class OverdueLoan(Base):
+    """An open loan past its due date (see app.services.overdue)."""
+    __tablename__ = 'overdue_loans'
+
+    loan_id = Column(Integer, ForeignKey("loans.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    due_date = Column(Date, nullable=False, index=True)
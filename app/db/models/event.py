@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, JSON, func
+from sqlalchemy import Column, Integer, DateTime, Float, String, ForeignKey, JSON, func, text
 from sqlalchemy.orm import relationship
 
 from app.db import Base
@@ -21,3 +21,26 @@ class Event(Base):
     user = relationship("User", back_populates="events")
 
     meta_data = Column(JSON, nullable=True)
+
+    # Requests this row stands for (1 / sample rate); see app.services.event.CaptureRules.
+    sample_weight = Column(Float, nullable=False, default=1.0, server_default=text("1"))
+
+
+class EventRollup(Base):
+    """Hourly aggregate of `events` per method and path (see app.services.retention)."""
+
+    __tablename__ = 'event_rollups'
+
+    hour = Column(DateTime, primary_key=True)
+    method = Column(String, primary_key=True, default="", server_default=text("''"))
+    path = Column(String, primary_key=True, default="", server_default=text("''"))
+
+    count = Column(Integer, nullable=False, default=0)
+    estimated_count = Column(Float, nullable=False, default=0, server_default=text("0"))  # sum of sample weights
+    status_2xx = Column(Integer, nullable=False, default=0)
+    status_3xx = Column(Integer, nullable=False, default=0)
+    status_4xx = Column(Integer, nullable=False, default=0)
+    status_5xx = Column(Integer, nullable=False, default=0)
+    status_other = Column(Integer, nullable=False, default=0)
+    duration_ms_sum = Column(Integer, nullable=False, default=0)
+    duration_ms_max = Column(Integer, nullable=True)
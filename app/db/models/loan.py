@@ -1,7 +1,7 @@
 from datetime import date
 
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import Column, Integer, Date, ForeignKey
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.db import Base
@@ -14,10 +14,16 @@ class Loan(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), index=True, nullable=False)
-    borrow_date = Column(Date, nullable=False, default=date.today())
+    borrow_date = Column(Date, nullable=False, default=date.today(), index=True)
     due_date = Column(Date, nullable=False, default=date.today() + relativedelta(months=1))
-    return_date = Column(Date)
+    return_date = Column(Date, index=True)
 
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
     user = relationship("User", back_populates="loans")
     book = relationship("Book", back_populates="loans")
+
+    # Partial indexes over open loans only: lookups per user (and book), and loans by due date (overdue).
+    __table_args__ = (
+        Index("ix_loans_open_user_book", user_id, book_id, sqlite_where=return_date.is_(None)),
+        Index("ix_loans_open_due_date", due_date, sqlite_where=return_date.is_(None)),
+    )
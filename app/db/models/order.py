@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SAEnum, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SAEnum, func
 from sqlalchemy.orm import relationship
 
 from app.core.enums import OrderStatus
@@ -10,7 +10,7 @@ class BookOrder(Base):
     __tablename__ = 'book_orders'
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
     book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
 
     order_date = Column(DateTime(timezone=True), default=func.now())
@@ -21,3 +21,8 @@ class BookOrder(Base):
 
     user = relationship("User", back_populates="book_orders")
     book = relationship("Book", back_populates="orders")
+
+    # Waiting-list order per book: the queue head and position counts are index range scans.
+    __table_args__ = (
+        Index("ix_book_orders_queue", book_id, status, priority.desc(), order_date, id),
+    )
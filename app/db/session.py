@@ -1,11 +1,108 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator
+
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URL, connect_args={
-    "check_same_thread": False})
+# Reported next to uvicorn's own startup messages.
+logger = logging.getLogger("uvicorn.error")
+
+
+def engine_profile(name: str = settings.DB_PROFILE) -> Dict[str, Dict[str, Any]]:
+    try:
+        return settings.DB_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}; expected one of {sorted(settings.DB_PROFILES)}") from None
+
+
+class QueryStats:
+    """SQL run on behalf of one request: statements, time spent executing them, and each SELECT's distinct parameters."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.selects: Dict[str, set] = {}
+
+    def record(self, statement: str, parameters: Any, executemany: bool) -> None:
+        self.count += 1
+        if parameters and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            self.selects.setdefault(statement, set()).add(repr(parameters))
+
+    def repeated(self, limit: int) -> Dict[str, int]:
+        """SELECTs run with `limit` or more different parameter sets (the N of an N+1)."""
+        return {statement: len(seen) for statement, seen in self.selects.items() if len(seen) >= limit}
+
+
+# Set by ResponseTimeMiddleware for the duration of a request; sync endpoints run in a
+# copy of the request's context, so the engine hooks below add to the same object.
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(statement, parameters, executemany)
+        conn.info["query_started"] = time.perf_counter()
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.pop("query_started", None)
+    stats = query_stats.get()
+    if stats is not None and started is not None:
+        stats.seconds += time.perf_counter() - started
+
+
+def make_engine(url: str = settings.SQLALCHEMY_DATABASE_URL, profile: str = settings.DB_PROFILE) -> Engine:
+    """
+    Engine with the named profile: its PRAGMAs run on every new SQLite connection and its
+    pool settings apply to file databases (in-memory SQLite keeps SQLAlchemy's own pool).
+    Statements run inside a request are counted and timed into the request's `QueryStats`.
+    """
+    options = engine_profile(profile)
+    sqlite = make_url(url).get_backend_name() == "sqlite"
+    kwargs: Dict[str, Any] = {}
+    if sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not sqlite or make_url(url).database not in (None, "", ":memory:"):
+        kwargs.update(options.get("pool", {}))
+    new_engine = create_engine(url, **kwargs)
+    event.listen(new_engine, "before_cursor_execute", _start_query)
+    event.listen(new_engine, "after_cursor_execute", _end_query)
+
+    if sqlite:
+        pragmas = options.get("pragmas", {})
+
+        @event.listens_for(new_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name} = {value}")
+            finally:
+                cursor.close()
+
+    return new_engine
+
+
+def describe_engine(bind: Engine, profile: str = settings.DB_PROFILE) -> Dict[str, Any]:
+    """Profile name, pool status and the PRAGMA values a connection actually ended up with."""
+    described: Dict[str, Any] = {"profile": profile, "pool": bind.pool.status()}
+    if bind.dialect.name == "sqlite":
+        with bind.connect() as connection:
+            for name in engine_profile(profile).get("pragmas", {}):
+                described[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return described
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, )
 
@@ -18,3 +115,64 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Run several service calls on `db` as one transaction.
+
+    Inside the block `commit(db)` only flushes; the outermost block commits once when it
+    exits cleanly and rolls back on error. Nested blocks join the outer one, and a service
+    that rolls back inside the block discards the whole unit.
+    """
+    depth = db.info.get("uow_depth", 0)
+    db.info["uow_depth"] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info["uow_depth"] = depth
+
+
+def commit(db: Session) -> None:
+    """Commit the service-layer write, or only flush it when it runs inside a `unit_of_work`."""
+    if db.info.get("uow_depth"):
+        db.flush()
+    else:
+        db.commit()
+
+
+def upsert(db: Session, model):
+    """
+    `insert(model)` in the session's dialect, which adds `on_conflict_do_update` /
+    `on_conflict_do_nothing` and `excluded` (the same API on SQLite and PostgreSQL).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
+    return _UPSERT_INSERTS[dialect](model)
+
+
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    """Run `callback` once the current transaction commits (dropped on rollback)."""
+    db.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    for callback in session.info.pop("on_commit", ()):
+        callback()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_on_commit(session: Session) -> None:
+    session.info.pop("on_commit", None)
@@ -1,20 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
 from app.api.deps import ResponseTimeMiddleware
-from app.db.session import Base, engine
+from app.core.hashing import hasher
+from app.db.fts import ensure_book_search_index
+from app.db.session import Base, SessionLocal, describe_engine, engine, logger
 from app.api.routers import auth as auth_router
 from app.api.routers import users as users_router
 from app.api.routers import books as books_router
 from app.api.routers import loans as loans_router
 from app.api.routers import orders as orders_router
 from app.api.routers import statistics as statistics_router
+from app.api.routers import exports as exports_router
+from app.api.routers import metrics as metrics_router
+from app.core import metrics
+from app.services import counters
+from app.services.event import event_buffer
+from app.services.overdue import overdue_worker
+from app.services.retention import retention_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and drain them on shutdown."""
+    event_buffer.start()
+    hasher.start(asyncio.get_running_loop())
+    retention_worker.start()
+    overdue_worker.start()
+    try:
+        yield
+    finally:
+        await run_in_threadpool(overdue_worker.stop)
+        await run_in_threadpool(retention_worker.stop)
+        await run_in_threadpool(hasher.stop)
+        await run_in_threadpool(event_buffer.stop)
 
 
 def main():
     """Main application entry point."""
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.add_middleware(ResponseTimeMiddleware)
 
     Base.metadata.create_all(bind=engine)
+    logger.info("Database engine: %s", describe_engine(engine))
+    ensure_book_search_index(engine)
+    with SessionLocal() as db:
+        counters.ensure(db)
 
     app.include_router(auth_router.router)
     app.include_router(users_router.router)
@@ -22,6 +56,17 @@ def main():
     app.include_router(loans_router.router)
     app.include_router(orders_router.router)
     app.include_router(statistics_router.router)
+    app.include_router(exports_router.router)
+    app.include_router(metrics_router.router)
+
+    metrics.instrument_engine(engine)
+    metrics.register_gauge("event_buffer", "Request-event buffer: buffered rows and rows written/dropped/failed.",
+                           event_buffer.stats)
+    metrics.register_gauge("password_hasher", "Password-hashing pool: waiting/in-flight jobs and queue time.",
+                           hasher.stats)
+    metrics.register_gauge("event_retention", "Event retention job: runs and failures.", retention_worker.stats)
+    metrics.register_gauge("overdue_refresh", "Overdue-loan refresh job: runs, failures and rows changed.",
+                           overdue_worker.stats)
     return app
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
-from .books import ShowBook, CreateBook, UpdateBook
+from .books import ShowBook, CreateBook, UpdateBook, ImportBook, BookImportReport
 from .events import ShowEvent, EventBase
-from .loans import ShowLoan, CreateLoan, UpdateLoan, PublicLoan
+from .loans import ShowLoan, CreateLoan, UpdateLoan, PublicLoan, BatchCheckout, BatchReturn, BatchLoanReport
 from .order import CreateBookOrder, ShowBookOrder
 from .statistics import LibraryOverview, BookStatistics, UserStatistics, OperationalStats
 from .token import Token, TokenPayload
@@ -8,8 +8,8 @@ from .users import ShowUser, CreateUser, UpdateUser, SignupUser
 
 __all__ = [
     "ShowUser", "CreateUser", "UpdateUser", "SignupUser",
-    "ShowBook", "CreateBook", "UpdateBook",
-    "ShowLoan", "CreateLoan", "UpdateLoan", "PublicLoan",
+    "ShowBook", "CreateBook", "UpdateBook", "ImportBook", "BookImportReport",
+    "ShowLoan", "CreateLoan", "UpdateLoan", "PublicLoan", "BatchCheckout", "BatchReturn", "BatchLoanReport",
     "ShowEvent", "EventBase",
     "CreateBookOrder", "ShowBookOrder",
     "Token", "TokenPayload",
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 
 from .loans import PublicLoan
 
@@ -15,6 +15,31 @@ class CreateBook(BookBase):
     pass
 
 
+class ImportBook(CreateBook):
+    """One row of a bulk import; `total_copies` defaults to `available_copies`."""
+    total_copies: int | None = None
+
+    @model_validator(mode="after")
+    def check_copies(self) -> "ImportBook":
+        if self.total_copies is None:
+            self.total_copies = self.available_copies
+        if not 0 <= self.available_copies <= self.total_copies:
+            raise ValueError("available_copies must be between 0 and total_copies")
+        return self
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BookImportReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = Field(default_factory=list)
+    errors_truncated: bool = False
+
+
 class UpdateBook(BaseModel):
     title: str | None = None
     author: str | None = None
@@ -10,6 +10,7 @@ class EventBase(BaseModel):
     user_id: int | None = None
     meta_data: dict[str, Any] | None = None
     duration_ms: int | None = None
+    sample_weight: float = 1.0
     model_config = ConfigDict(extra="ignore")
 
 
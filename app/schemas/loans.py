@@ -1,6 +1,8 @@
 from datetime import date
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.config import settings
 
 
 class LoanBase(BaseModel):
@@ -36,3 +38,33 @@ class PublicLoan(BaseModel):
     due_date: date
     return_date: date | None = None
     model_config = ConfigDict(from_attributes=True)
+
+
+class CheckoutItem(BaseModel):
+    user_id: int
+    book_id: int
+
+
+class BatchCheckout(BaseModel):
+    """Checkouts processed together in one transaction."""
+    items: list[CheckoutItem] = Field(min_length=1, max_length=settings.LOAN_BATCH_MAX)
+    loan_days: int = Field(settings.LOAN_DAYS, ge=1, description="Days until the loans are due")
+
+
+class BatchReturn(BaseModel):
+    """Loan ids returned together in one transaction."""
+    loan_ids: list[int] = Field(min_length=1, max_length=settings.LOAN_BATCH_MAX)
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item, by its position in the request."""
+    index: int
+    ok: bool
+    loan: ShowLoan | None = None
+    error: str | None = None
+
+
+class BatchLoanReport(BaseModel):
+    succeeded: int = 0
+    failed: int = 0
+    results: list[BatchItemResult] = Field(default_factory=list)
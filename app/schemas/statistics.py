@@ -1,10 +1,12 @@
+from datetime import datetime, timezone
 from typing import Dict, Any, List
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class StatisticsBase(BaseModel):
     """Base statistics schema following project conventions."""
+    generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     model_config = ConfigDict(extra="ignore")
 
 
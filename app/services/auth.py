@@ -1,25 +1,35 @@
 from fastapi import status, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.enums import UserRole
 from app.core.security import *
 from app.db.models.user import User
+from app.db.session import commit
 from app.schemas.users import SignupUser
+from .base import snapshot
 from .user import crud_user
 
 
-def login(form_data: OAuth2PasswordRequestForm, db: Session):
-    user = crud_user.get_by(db, email=form_data.username)
+async def login(form_data: OAuth2PasswordRequestForm, db: Session):
+    """
+    Check credentials and issue a token. Runs on the event loop: database work goes to the
+    threadpool and bcrypt to the hashing pool, so waiting logins hold neither.
+    """
+    user = await run_in_threadpool(crud_user.get_by, db, email=form_data.username)
 
-    if not user or not verify_password(form_data.password, user.password):
-        print(f"{user.password}")
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_and_update(form_data.password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
+    if new_hash:
+        await run_in_threadpool(crud_user.set_password_hash, db, db_obj=user, hashed=new_hash)
 
     access_token = create_access_token(subject=str(user.id))
     return {"access_token": access_token, "token_type": "bearer"}
@@ -45,6 +55,7 @@ def register(db, *, obj_in: SignupUser) -> User:
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    db.flush()
+    crud_user.on_write(db, None, snapshot(new_user))
+    commit(db)
     return new_user
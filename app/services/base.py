@@ -1,16 +1,54 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
+from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import func, inspect, select, tuple_
+from sqlalchemy.orm import Query, Session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.db.session import Base
+from app.db.session import Base, commit
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def snapshot(obj) -> Dict[str, Any]:
+    """Column values of an ORM object, as a plain dict."""
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Pack the sort-key values of the last row on a page into an opaque URL-safe cursor."""
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> list:
+    """Inverse of `encode_cursor`, coercing each value back to its column's Python type."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        decoded = []
+        for value, column in zip(values, columns):
+            python_type = column.type.python_type
+            if value is not None and issubclass(python_type, date):
+                value = python_type.fromisoformat(value)
+            elif value is not None:
+                value = python_type(value)
+            decoded.append(value)
+        return decoded
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -28,18 +66,108 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_by(self, db: Session, **filters) -> Optional[ModelType]:
         return db.query(self.model).filter_by(**filters).first()
 
-    def list_like(self, db: Session, **likes) -> List[ModelType]:
+    def load_collections(
+            self,
+            db: Session,
+            parents: List[ModelType],
+            *,
+            schema: Type[BaseModel],
+            plan: Dict[str, list],
+            limit: int,
+    ) -> List[ModelType]:
+        """
+        Fill the one-to-many collections `schema` embeds, bounded in SQL.
+
+        For every collection named in `plan` (name → extra WHERE criteria), one windowed
+        SELECT fetches at most `limit` most recent rows per parent. Collections the schema
+        embeds but `plan` leaves out are set to empty without a query. Parents must not
+        have eager-loaded these collections.
+        """
+        relationships = inspect(self.model).relationships
+        for name in schema.model_fields:
+            relationship = relationships.get(name)
+            if relationship is None or not relationship.uselist:
+                continue
+            children: Dict[Any, list] = {}
+            if name in plan and limit > 0 and parents:
+                children = self._recent_children(db, relationship, parents, plan[name], limit)
+            local = relationship.local_remote_pairs[0][0]
+            for parent in parents:
+                set_committed_value(parent, name, children.get(getattr(parent, local.key), []))
+        return parents
+
+    @staticmethod
+    def _recent_children(db: Session, relationship, parents, criteria, limit: int) -> Dict[Any, list]:
+        local, remote = relationship.local_remote_pairs[0]
+        child_pk = relationship.mapper.primary_key[0]
+        rank = func.row_number().over(partition_by=remote, order_by=child_pk.desc()).label("rank")
+        ranked = (
+            select(relationship.mapper.class_, rank)
+            .where(remote.in_({getattr(parent, local.key) for parent in parents}), *criteria)
+            .subquery()
+        )
+        recent = aliased(relationship.mapper.class_, ranked)
+        rows = db.scalars(
+            select(recent).where(ranked.c.rank <= limit).order_by(ranked.c[child_pk.name].desc())
+        )
+        children: Dict[Any, list] = {}
+        for row in rows:
+            children.setdefault(getattr(row, remote.key), []).append(row)
+        return children
+
+    def query_like(self, db: Session, **likes) -> Query:
         q = db.query(self.model)
         for col, val in likes.items():
             q = q.filter(getattr(self.model, col).ilike(f"%{val}%"))
-        return q.all()
+        return q
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+    def list_like(self, db: Session, **likes) -> List[ModelType]:
+        return self.query_like(db, **likes).all()
+
+    def list_page(self, db: Session, *, limit: int, after: str | None = None,
+                  **likes) -> Tuple[List[ModelType], str | None]:
+        """`list_like` one keyset page at a time, in primary-key order."""
+        return self.paginate(self.query_like(db, **likes), limit=limit, after=after)
+
+    def paginate(
+            self,
+            q: Query,
+            *,
+            limit: int,
+            after: str | None = None,
+            sort: Any = None,
+            descending: bool = False,
+    ) -> Tuple[List[ModelType], str | None]:
+        """
+        Keyset (cursor) pagination.
+
+        Orders `q` by (`sort`, primary key) — or just the primary key — and returns at most
+        `limit` rows that come after the `after` cursor, plus the cursor for the next page
+        (None on the last page). `q` must not carry its own ORDER BY.
+        """
+        pk = self.model.__mapper__.primary_key[0]
+        keys = [pk] if sort is None else [sort, pk]
+        if after:
+            values = decode_cursor(after, keys)
+            bound = tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values)
+            q = q.filter(bound)
+        q = q.order_by(*[key.desc() if descending else key for key in keys])
+
+        rows = q.limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+    def create(self, db: Session, *, obj_in: CreateSchemaType, refresh: bool = False) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
+        self.on_write(db, None, snapshot(db_obj))
+        commit(db)
+        if refresh:
+            db.refresh(db_obj)
         return db_obj
 
     def update(
@@ -47,9 +175,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db: Session,
             *,
             db_obj: ModelType,
-            obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+            refresh: bool = False,
     ) -> ModelType:
         obj_data = jsonable_encoder(db_obj)
+        before = snapshot(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
@@ -58,12 +188,35 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
+        self.on_write(db, before, snapshot(db_obj))
+        commit(db)
+        if refresh:
+            db.refresh(db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.get(self.model, id)
+        self.on_write(db, snapshot(obj), None)
         db.delete(obj)
-        db.commit()
+        commit(db)
         return obj
+
+    def on_write(self, db: Session, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+        """
+        Hook run inside every write transaction, before the commit.
+
+        `before`/`after` are column snapshots of the row (None on create/delete respectively).
+        Subclasses use it to keep derived data, such as the statistics counters, in step,
+        and must call super() so the table is recorded for statistics cache invalidation.
+        """
+        self.mark_written(db)
+
+    def on_write_many(self, db: Session, changes: Sequence[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """`on_write` for a batch of `(before, after)` snapshots; subclasses may aggregate the work."""
+        for before, after in changes:
+            self.on_write(db, before, after)
+
+    def mark_written(self, db: Session) -> None:
+        """Record that this transaction writes the model's table (read on commit by the statistics cache)."""
+        db.info.setdefault("written_tables", set()).add(self.model.__tablename__)
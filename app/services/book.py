@@ -1,10 +1,17 @@
-from typing import List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Tuple
 
+from pydantic import ValidationError
+from sqlalchemy import case, insert, or_, text, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.db import fts
 from app.db.models.book import Book
-from app.schemas.books import CreateBook, UpdateBook
-from app.services.base import CRUDBase
+from app.schemas.books import BookImportReport, CreateBook, ImportBook, ImportRowError, UpdateBook
+from app.services import counters
+from app.services.base import CRUDBase, decode_cursor, encode_cursor
 
 
 class CRUDbook(CRUDBase[Book, CreateBook, UpdateBook]):
@@ -12,16 +19,130 @@ class CRUDbook(CRUDBase[Book, CreateBook, UpdateBook]):
         """Get books that are available for checkout."""
         return db.query(Book).filter(Book.available_copies > 0).all()
 
-    def update_availability(self, db: Session, book_id: int, change: int) -> Optional[Book]:
-        """Update book availability (positive=return, negative=checkout)."""
-        book = self.get(db, book_id)
-        if book:
-            new_available = book.available_copies + change
-            if 0 <= new_available <= book.total_copies:
-                book.available_copies = new_available
+    def search(self, db: Session, query: str, *, limit: int, after: str | None = None,
+               **likes) -> Tuple[List[Book], str | None]:
+        """
+        Full-text search over title, author and genre; every word matches as a prefix.
+
+        Keyset-paginated like `paginate`: best matches first, ordered by (rank, id), with
+        the cursor for the next page (None on the last one). Without FTS5 the same words
+        are matched with ILIKE at the start of a word, in primary-key order.
+        """
+        match = fts.match_expression(query)
+        if match is None:
+            return [], None
+        if not fts.is_supported(db.get_bind()):
+            q = self.query_like(db, **likes)
+            for word in fts.tokens(query):
+                q = q.filter(or_(*(column.ilike(pattern) for column in (Book.title, Book.author, Book.genre)
+                                   for pattern in (f"{word}%", f"% {word}%"))))
+            return self.paginate(q, limit=limit, after=after)
+        keys = [fts.books_fts.c.rank, Book.id]
+        q = self.query_like(db, **likes).add_columns(fts.books_fts.c.rank)
+        q = q.join(fts.books_fts, fts.books_fts.c.rowid == Book.id)
+        q = q.filter(text("books_fts MATCH :match")).params(match=match)
+        if after:
+            q = q.filter(tuple_(*keys) > tuple_(*decode_cursor(after, keys)))
+
+        rows = q.order_by(*keys).limit(limit + 1).all()
+        books = [book for book, _ in rows[:limit]]
+        if len(rows) <= limit:
+            return books, None
+        last, rank = rows[limit - 1]
+        return books, encode_cursor([rank, last.id])
+
+    def bulk_import(self, db: Session, rows: Iterable[Dict[str, Any] | Exception], *,
+                    chunk_size: int = settings.IMPORT_CHUNK_SIZE,
+                    max_errors: int = settings.IMPORT_MAX_ERRORS) -> BookImportReport:
+        """
+        Validate and insert catalog rows in chunks, one executemany + commit per chunk.
+
+        Invalid rows (or exceptions from the parser, passed in place of a row) are skipped and
+        reported by their 1-based position in `rows`; a chunk the database rejects is rolled
+        back and all of its rows are reported.
+        """
+        report = BookImportReport()
+
+        def fail(row_number: int, error: str) -> None:
+            report.failed += 1
+            if len(report.errors) < max_errors:
+                report.errors.append(ImportRowError(row=row_number, error=error))
+            else:
+                report.errors_truncated = True
+
+        numbered = enumerate(rows, start=1)
+        while chunk := list(islice(numbered, chunk_size)):
+            valid, row_numbers = [], []
+            for row_number, raw in chunk:
+                if isinstance(raw, Exception):
+                    fail(row_number, str(raw))
+                    continue
+                try:
+                    book = ImportBook.model_validate(raw)
+                except ValidationError as e:
+                    fail(row_number, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+                    continue
+                values = book.model_dump()
+                valid.append(values)
+                row_numbers.append(row_number)
+            if not valid:
+                continue
+
+            try:
+                db.execute(insert(Book), valid)
+                counters.books_imported(db, sum(values["total_copies"] for values in valid))
+                self.mark_written(db)
                 db.commit()
-                db.refresh(book)
-        return book
+            except SQLAlchemyError as e:
+                db.rollback()
+                for row_number in row_numbers:
+                    fail(row_number, str(getattr(e, "orig", None) or e))
+                continue
+            report.inserted += len(valid)
+        return report
+
+    def on_write(self, db: Session, before, after) -> None:
+        super().on_write(db, before, after)
+        counters.book_changed(db, before, after)
+
+    def adjust_availability(self, db: Session, changes: Dict[int, int]) -> bool:
+        """
+        Apply per-book availability deltas (book id → change) in one conditional UPDATE, without committing.
+
+        A book only changes if its count stays within 0..total_copies; returns False (and the
+        caller should roll back) unless every book in `changes` was updated.
+        """
+        changes = {book_id: change for book_id, change in changes.items() if change}
+        if not changes:
+            return True
+        change = case(changes, value=Book.id, else_=0)
+        result = db.execute(
+            update(Book)
+            .where(Book.id.in_(changes),
+                   Book.available_copies + change >= 0,
+                   Book.available_copies + change <= Book.total_copies)
+            .values(available_copies=Book.available_copies + change)
+            .execution_options(synchronize_session="fetch")
+        )
+        self.mark_written(db)
+        return result.rowcount == len(changes)
+
+    def update_availability(self, db: Session, book_id: int, change: int) -> bool:
+        """
+        Atomically update book availability (positive=return, negative=checkout), without committing.
+
+        A single `UPDATE ... WHERE id = ? AND available_copies + change BETWEEN 0 AND total_copies`;
+        False means the book is missing or has no copy to give out (or take back).
+        """
+        result = db.execute(
+            update(Book)
+            .where(Book.id == book_id,
+                   Book.available_copies + change >= 0,
+                   Book.available_copies + change <= Book.total_copies)
+            .values(available_copies=Book.available_copies + change)
+        )
+        self.mark_written(db)
+        return result.rowcount == 1
 
 
 crud_book = CRUDbook(Book)
@@ -0,0 +1,194 @@
+"""
+Library Counters
+----------------
+
+Incrementally maintained totals behind the statistics overview, so it is a
+constant-time read instead of a scan of `books` and `loans`.
+
+Counters (rows of `library_counters`):
+- total_copies   → SUM(books.total_copies)
+- active_users   → users with is_active
+- total_loans    → loans of active users
+- on_loan        → open loans (return_date IS NULL) of active users
+- waiting_orders → WAITING orders of active users
+
+`loan_due_counters` holds open loans of active users per due date; overdue loans
+are the sum over dates before today (one row per day, not per loan).
+
+The CRUD classes call the `*_changed` functions from their `on_write` hook with
+before/after column snapshots, inside the same transaction as the write itself.
+`rebuild` recomputes everything from the source tables.
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.enums import OrderStatus
+from app.db.models.book import Book
+from app.db.models.counter import LibraryCounter, LoanDueCounter
+from app.db.models.loan import Loan
+from app.db.models.order import BookOrder
+from app.db.models.user import User
+from app.db.session import upsert
+
+TOTAL_COPIES = "total_copies"
+ACTIVE_USERS = "active_users"
+TOTAL_LOANS = "total_loans"
+ON_LOAN = "on_loan"
+WAITING_ORDERS = "waiting_orders"
+COUNTERS = (TOTAL_COPIES, ACTIVE_USERS, TOTAL_LOANS, ON_LOAN, WAITING_ORDERS)
+
+Snapshot = Optional[Dict[str, Any]]
+
+
+def read(db: Session) -> Dict[str, int]:
+    """All counters in one small SELECT (missing rows read as 0)."""
+    values = dict(db.execute(select(LibraryCounter.name, LibraryCounter.value)).all())
+    return {name: values.get(name, 0) for name in COUNTERS}
+
+
+def overdue(db: Session, today: date | None = None) -> int:
+    """Open loans of active users whose due date is before `today`."""
+    today = today or date.today()
+    return db.scalar(
+        select(func.coalesce(func.sum(LoanDueCounter.active_loans), 0)).where(LoanDueCounter.due_date < today)
+    )
+
+
+def books_imported(db: Session, total_copies: int) -> None:
+    """Account for books bulk-inserted without going through `on_write`."""
+    _apply(db, Counter({TOTAL_COPIES: total_copies}), Counter())
+
+
+def book_changed(db: Session, before: Snapshot, after: Snapshot) -> None:
+    deltas, due = Counter(), Counter()
+    deltas[TOTAL_COPIES] = (after or {}).get("total_copies", 0) - (before or {}).get("total_copies", 0)
+    if after is None:
+        # Deleting a book cascades to its loans and orders.
+        _activity(db, deltas, due, -1, book_id=before["id"])
+    _apply(db, deltas, due)
+
+
+def loan_changed(db: Session, before: Snapshot, after: Snapshot) -> None:
+    loans_changed(db, [(before, after)])
+
+
+def loans_changed(db: Session, changes: Iterable[Tuple[Snapshot, Snapshot]]) -> None:
+    """`loan_changed` for many loans at once, with one upsert per counter touched."""
+    changes = list(changes)
+    active = _active_users(db, {loan["user_id"] for change in changes for loan in change if loan is not None})
+    deltas, due = Counter(), Counter()
+    for before, after in changes:
+        for loan, sign in ((before, -1), (after, 1)):
+            if loan is None or loan["user_id"] not in active:
+                continue
+            deltas[TOTAL_LOANS] += sign
+            if loan["return_date"] is None:
+                deltas[ON_LOAN] += sign
+                due[loan["due_date"]] += sign
+    _apply(db, deltas, due)
+
+
+def order_changed(db: Session, before: Snapshot, after: Snapshot) -> None:
+    orders_changed(db, [(before, after)])
+
+
+def orders_changed(db: Session, changes: Iterable[Tuple[Snapshot, Snapshot]]) -> None:
+    """`order_changed` for many orders at once: one active-user lookup and one upsert."""
+    waiting = [(order, sign) for before, after in changes for order, sign in ((before, -1), (after, 1))
+               if order and order["status"] == OrderStatus.WAITING]
+    active = _active_users(db, {order["user_id"] for order, _ in waiting})
+    deltas = Counter()
+    for order, sign in waiting:
+        if order["user_id"] in active:
+            deltas[WAITING_ORDERS] += sign
+    _apply(db, deltas, Counter())
+
+
+def user_changed(db: Session, before: Snapshot, after: Snapshot) -> None:
+    was_active = bool(before and before["is_active"])
+    is_active = bool(after and after["is_active"])
+    if was_active == is_active:
+        return
+    # (De)activating a user adds or removes everything they have borrowed or ordered.
+    sign = 1 if is_active else -1
+    deltas, due = Counter({ACTIVE_USERS: sign}), Counter()
+    _activity(db, deltas, due, sign, user_id=(after or before)["id"], active_users_only=False)
+    _apply(db, deltas, due)
+
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """Recompute every counter from the source tables and commit."""
+    db.execute(delete(LibraryCounter))
+    db.execute(delete(LoanDueCounter))
+
+    deltas, due = Counter(), Counter()
+    deltas[TOTAL_COPIES] = db.scalar(select(func.coalesce(func.sum(Book.total_copies), 0)))
+    deltas[ACTIVE_USERS] = db.scalar(select(func.count()).select_from(User).where(User.is_active == True))
+    _activity(db, deltas, due, 1)
+    db.add_all(LibraryCounter(name=name, value=deltas[name]) for name in COUNTERS)
+    db.add_all(LoanDueCounter(due_date=due_date, active_loans=n) for due_date, n in due.items() if n)
+    db.commit()
+    return read(db)
+
+
+def ensure(db: Session) -> None:
+    """Build the counters once for a database that predates them."""
+    if db.scalar(select(func.count()).select_from(LibraryCounter)) == 0:
+        rebuild(db)
+
+
+def _is_active_user(db: Session, user_id: int) -> bool:
+    user = db.get(User, user_id)
+    return bool(user and user.is_active)
+
+
+def _active_users(db: Session, user_ids: Set[int]) -> Set[int]:
+    """The active ones among `user_ids`: one SELECT for a batch, the session's identity map for a single user."""
+    if len(user_ids) <= 1:
+        return {user_id for user_id in user_ids if _is_active_user(db, user_id)}
+    return set(db.scalars(select(User.id).where(User.id.in_(user_ids), User.is_active == True)))
+
+
+def _activity(db: Session, deltas: Counter, due: Counter, sign: int, *, user_id: int | None = None,
+              book_id: int | None = None, active_users_only: bool = True) -> None:
+    """Add `sign` × the loans/orders matching `user_id`/`book_id` to `deltas` and `due`."""
+
+    def scoped(q, model):
+        if active_users_only:
+            q = q.join(User, User.id == model.user_id).where(User.is_active == True)
+        if user_id is not None:
+            q = q.where(model.user_id == user_id)
+        if book_id is not None:
+            q = q.where(model.book_id == book_id)
+        return q
+
+    deltas[TOTAL_LOANS] += sign * db.scalar(scoped(select(func.count(Loan.id)), Loan))
+    open_loans = scoped(select(Loan.due_date, func.count(Loan.id)), Loan).where(Loan.return_date == None)
+    for due_date, n in db.execute(open_loans.group_by(Loan.due_date)).all():
+        deltas[ON_LOAN] += sign * n
+        due[due_date] += sign * n
+    deltas[WAITING_ORDERS] += sign * db.scalar(
+        scoped(select(func.count(BookOrder.id)), BookOrder).where(BookOrder.status == OrderStatus.WAITING)
+    )
+
+
+def _apply(db: Session, deltas: Counter, due: Counter) -> None:
+    for name, delta in deltas.items():
+        if delta:
+            stmt = upsert(db, LibraryCounter).values(name=name, value=delta)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[LibraryCounter.name],
+                set_={"value": LibraryCounter.value + delta},
+            ))
+    for due_date, delta in due.items():
+        if delta:
+            stmt = upsert(db, LoanDueCounter).values(due_date=due_date, active_loans=delta)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[LoanDueCounter.due_date],
+                set_={"active_loans": LoanDueCounter.active_loans + delta},
+            ))
@@ -1,6 +1,16 @@
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.config import settings
 from app.db.models.event import Event
+from app.db.session import SessionLocal
 from app.schemas.events import EventBase
 from app.services.base import CRUDBase
 
@@ -21,3 +31,187 @@ def log_event(db, *, user=None, duration_ms=None, status_code=None, method=None,
         meta_data=jsonable_encoder(meta) if meta is not None else None
     )
     return crud_event.create(db, obj_in=event_in)
+
+
+class EventBuffer:
+    """
+    Bounded in-process queue for request events.
+
+    Producers only append to memory; a background thread drains the queue and
+    bulk-inserts `Event` rows in a single transaction per batch, either as soon as
+    `batch_size` rows are waiting or every `flush_interval_ms`. When the buffer is
+    full new events are dropped and counted in `dropped`; batches the database
+    rejects are counted in `failed`.
+    """
+
+    def __init__(self, *, max_size: int, batch_size: int, flush_interval_ms: int, session_factory=SessionLocal):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.session_factory = session_factory
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._pending: deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, row: dict) -> bool:
+        """Queue one `events` row. Returns False if the buffer is full and the row was dropped."""
+        with self._cond:
+            if len(self._pending) >= self.max_size:
+                self.dropped += 1
+                return False
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def start(self) -> None:
+        """Start the background flusher thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="event-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write out everything still buffered."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Drain the buffer into the database, one transaction per batch."""
+        written = 0
+        with self._flush_lock:
+            while batch := self._take():
+                try:
+                    with self.session_factory() as db:
+                        db.execute(insert(Event), batch)
+                        db.commit()
+                except SQLAlchemyError:
+                    self.failed += len(batch)
+                    break
+                written += len(batch)
+        self.written += written
+        return written
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._pending),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _take(self) -> list[dict]:
+        with self._cond:
+            size = min(self.batch_size, len(self._pending))
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            if stopping:
+                return
+            self.flush()
+
+
+event_buffer = EventBuffer(
+    max_size=settings.EVENT_BUFFER_SIZE,
+    batch_size=settings.EVENT_BATCH_SIZE,
+    flush_interval_ms=settings.EVENT_FLUSH_INTERVAL_MS,
+)
+
+
+def queue_event(*, user_id=None, duration_ms=None, status_code=None, method=None, object_type=None, meta=None,
+                sample_weight=1.0) -> bool:
+    """Non-blocking counterpart of `log_event`: buffer the row for the background flusher."""
+    return event_buffer.put({
+        "timestamp": datetime.now(timezone.utc),
+        "object_type": object_type,
+        "duration_ms": duration_ms,
+        "status_code": status_code,
+        "method": method,
+        "user_id": user_id,
+        "meta_data": jsonable_encoder(meta) if meta else None,
+        "sample_weight": sample_weight,
+    })
+
+
+class CaptureRules:
+    """
+    Decides which requests become `Event` rows, and at what sampling weight.
+
+    A rule is a path (`/books/`) or a prefix (`/books/*`), optionally tied to a method
+    (`GET /books/*`); the longest matching path wins, method-specific rules before generic ones.
+    `weight()` returns None for requests that are not captured, otherwise the number of
+    requests the row stands for: 1 for always-captured errors and slow requests, 1 / rate
+    for sampled ones.
+    """
+
+    def __init__(self, *, rates: Dict[str, float], default_rate: float, never: Iterable[str],
+                 status_min: int, slow_ms: int):
+        self.rates = self._compile(rates.items())
+        self.never = self._compile((pattern, 0.0) for pattern in never)
+        self.default_rate = default_rate
+        self.status_min = status_min
+        self.slow_ms = slow_ms
+
+    def rate(self, method: str, path: str) -> float:
+        rate = self._match(self.rates, method, path)
+        return self.default_rate if rate is None else rate
+
+    def weight(self, method: str, path: str, status_code: int, duration_ms: int) -> float | None:
+        if self._match(self.never, method, path) is not None:
+            return None
+        if (self.status_min and status_code >= self.status_min) or (self.slow_ms and duration_ms >= self.slow_ms):
+            return 1.0
+        rate = self.rate(method, path)
+        if rate >= 1:
+            return 1.0
+        if rate <= 0 or random.random() >= rate:
+            return None
+        return 1 / rate
+
+    @staticmethod
+    def _compile(rules: Iterable[Tuple[str, float]]) -> List[tuple]:
+        compiled = []
+        for pattern, rate in rules:
+            method, _, path = pattern.strip().rpartition(" ")
+            prefix = path.endswith("*")
+            compiled.append((method.upper() or None, path.rstrip("*"), prefix, rate))
+        # Most specific first: longer path, then exact before prefix, then method-specific.
+        compiled.sort(key=lambda rule: (len(rule[1]), not rule[2], rule[0] is not None), reverse=True)
+        return compiled
+
+    @staticmethod
+    def _match(rules: List[tuple], method: str, path: str) -> float | None:
+        for rule_method, rule_path, prefix, rate in rules:
+            if rule_method not in (None, method):
+                continue
+            if path.startswith(rule_path) if prefix else path == rule_path:
+                return rate
+        return None
+
+
+capture_rules = CaptureRules(
+    rates=settings.EVENT_SAMPLE_RATES,
+    default_rate=settings.EVENT_SAMPLE_RATE,
+    never=settings.EVENT_NEVER_CAPTURE,
+    status_min=settings.EVENT_CAPTURE_STATUS_MIN,
+    slow_ms=settings.EVENT_CAPTURE_SLOW_MS,
+)
@@ -0,0 +1,128 @@
+"""
+Exports
+-------
+
+Constant-memory dumps of books, loans, users and events for reporting.
+
+The `*_query` builders return a Core SELECT over plain columns (no ORM objects,
+no Pydantic models); `stream` runs it with `yield_per` so rows come off the cursor
+in chunks of EXPORT_CHUNK_SIZE and are encoded as NDJSON or CSV as they go.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator
+
+from sqlalchemy import Select, select
+
+from app.core.config import settings
+from app.core.enums import FileFormat
+from app.db.models.book import Book
+from app.db.models.event import Event
+from app.db.models.loan import Loan
+from app.db.models.user import User
+from app.db.session import SessionLocal
+
+MEDIA_TYPES = {
+    FileFormat.NDJSON: "application/x-ndjson",
+    FileFormat.CSV: "text/csv",
+}
+
+USER_COLUMNS = (User.id, User.full_name, User.email, User.phone_number, User.join_date,
+                User.address, User.role, User.is_active)
+
+
+def books_query(*, title: str | None = None, author: str | None = None, genre: str | None = None,
+                published_year: int | None = None) -> Select:
+    stmt = select(*Book.__table__.columns)
+    if title:
+        stmt = stmt.where(Book.title.ilike(f"%{title}%"))
+    if author:
+        stmt = stmt.where(Book.author.ilike(f"%{author}%"))
+    if genre:
+        stmt = stmt.where(Book.genre.ilike(f"%{genre}%"))
+    if published_year:
+        stmt = stmt.where(Book.published_year == published_year)
+    return stmt.order_by(Book.id)
+
+
+def loans_query(*, user_id: int | None = None, book_id: int | None = None, since: date | None = None,
+                until: date | None = None, active_only: bool = False) -> Select:
+    """Loans, optionally restricted to a borrow-date range [since, until)."""
+    stmt = select(*Loan.__table__.columns)
+    if user_id:
+        stmt = stmt.where(Loan.user_id == user_id)
+    if book_id:
+        stmt = stmt.where(Loan.book_id == book_id)
+    if since:
+        stmt = stmt.where(Loan.borrow_date >= since)
+    if until:
+        stmt = stmt.where(Loan.borrow_date < until)
+    if active_only:
+        stmt = stmt.where(Loan.return_date == None)
+    return stmt.order_by(Loan.id)
+
+
+def users_query(*, is_active: bool | None = None, role: str | None = None, since: date | None = None,
+                until: date | None = None) -> Select:
+    """Users without password hashes, optionally restricted to a join-date range [since, until)."""
+    stmt = select(*USER_COLUMNS)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if role:
+        stmt = stmt.where(User.role == role)
+    if since:
+        stmt = stmt.where(User.join_date >= since)
+    if until:
+        stmt = stmt.where(User.join_date < until)
+    return stmt.order_by(User.id)
+
+
+def events_query(*, user_id: int | None = None, method: str | None = None, status_code: int | None = None,
+                 since: datetime | None = None, until: datetime | None = None) -> Select:
+    """Events, optionally restricted to a timestamp range [since, until)."""
+    stmt = select(*Event.__table__.columns)
+    if user_id:
+        stmt = stmt.where(Event.user_id == user_id)
+    if method:
+        stmt = stmt.where(Event.method == method.upper())
+    if status_code:
+        stmt = stmt.where(Event.status_code == status_code)
+    if since:
+        stmt = stmt.where(Event.timestamp >= since)
+    if until:
+        stmt = stmt.where(Event.timestamp < until)
+    return stmt.order_by(Event.id)
+
+
+def stream(stmt: Select, fmt: FileFormat, chunk_size: int = settings.EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Run `stmt` in its own session and yield the encoded rows one chunk at a time."""
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        keys = list(result.keys())
+        if fmt == FileFormat.CSV:
+            yield _csv_lines([keys])
+        for rows in result.partitions():
+            if fmt == FileFormat.CSV:
+                yield _csv_lines([[_plain(value) for value in row] for row in rows])
+            else:
+                yield "".join(json.dumps(dict(zip(keys, row)), default=_plain) + "\n" for row in rows)
+
+
+def _csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
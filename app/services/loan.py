@@ -1,60 +1,234 @@
+from collections import Counter
 from datetime import date, timedelta
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from sqlalchemy import inspect, select, tuple_, update
+from sqlalchemy.orm import Query, Session
 
+from app.core.config import settings
+from app.db.models.book import Book
 from app.db.models.loan import Loan
-from app.schemas.loans import CreateLoan, UpdateLoan
-from app.services.base import CRUDBase
+from app.db.models.user import User
+from app.db.session import commit
+from app.schemas.loans import BatchItemResult, BatchLoanReport, CheckoutItem, CreateLoan, ShowLoan, UpdateLoan
+from app.services import counters, overdue
+from app.services.base import CRUDBase, snapshot
+from app.services.order import crud_order
 from . import crud_book
 
 
 class CRUDloan(CRUDBase[Loan, CreateLoan, UpdateLoan]):
-    def create_checkout(self, db: Session, *, user_id: int, book_id: int, loan_month: int = 1) -> Optional[Loan]:
-        """Create a new loan"""
-        book = crud_book.get(db, book_id)
-        if not book or book.available_copies <= 0:
-            return None
+    def create_checkout(self, db: Session, *, user_id: int, book_id: int, loan_days: int = settings.LOAN_DAYS) -> Optional[Loan]:
+        """
+        Create a new loan.
 
-        existing = self.get_active_loan(db, user_id=user_id, book_id=book_id)
-        if existing:
+        The copy is taken first with a conditional UPDATE, which also makes this the
+        writer holding the lock, so concurrent checkouts can never oversell a book.
+        Returns None (and rolls back) if no copy is available or the user already has one.
+        """
+        if not crud_book.update_availability(db, book_id, -1):
+            db.rollback()
+            return None
+        if self.query_active(db, user_id=user_id, book_id=book_id).first():
+            db.rollback()
             return None
 
-        due_date = date.today() + timedelta(days=loan_month)
+        due_date = date.today() + timedelta(days=loan_days)
         loan = Loan(user_id=user_id, book_id=book_id, due_date=due_date)
         db.add(loan)
-
-        crud_book.update_availability(db, book_id, -1)
-
-        db.commit()
-        db.refresh(loan)
+        db.flush()
+        self.on_write(db, None, snapshot(loan))
+        commit(db)
         return loan
 
     def return_book(self, db: Session, loan_id: int) -> Optional[Loan]:
-        """Return a book."""
+        """
+        Return a book; None if the loan does not exist or was already returned (also when concurrently).
+
+        The freed copy goes straight to the head of the book's waiting list (see `serve_waiting`);
+        only if nobody is waiting does it go back on the shelf. If the book cannot take it back
+        (already at total_copies), the return is rolled back with a 409.
+        """
         loan = self.get(db, loan_id)
         if not loan or loan.return_date is not None:
             return None
 
-        loan.return_date = date.today()
-        crud_book.update_availability(db, loan.book_id, 1)
-        db.commit()
-        db.refresh(loan)
+        before = snapshot(loan)
+        returned = db.execute(
+            update(Loan).where(Loan.id == loan_id, Loan.return_date == None).values(return_date=date.today())
+        )
+        if returned.rowcount != 1:
+            db.rollback()
+            return None
+        self.on_write(db, before, snapshot(loan))
+        if not self.serve_waiting(db, loan.book_id, 1) and not crud_book.update_availability(db, loan.book_id, 1):
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="The returned copy does not fit the book's total copies; nothing was returned")
+        commit(db)
         return loan
 
-    def get_active_loan(self, db: Session, book_id: int | None = None) -> Optional[List[Loan]]:
-        """Get active loans"""
+    def serve_waiting(self, db: Session, book_id: int, copies: int, *, loan_days: int = settings.LOAN_DAYS) -> int:
+        """
+        Lend up to `copies` returned copies of a book to the head of its waiting list, without committing.
+
+        Each order popped by `crud_order.fulfil_next` is marked FULFILLED and its user gets a new
+        loan, so the copy never becomes available in between. Returns the copies handed over;
+        the caller puts the rest back on the shelf.
+        """
+        orders = crud_order.fulfil_next(db, book_id, copies)
+        if not orders:
+            return 0
+        due_date = date.today() + timedelta(days=loan_days)
+        loans = [Loan(user_id=order.user_id, book_id=book_id, due_date=due_date) for order in orders]
+        db.add_all(loans)
+        db.flush()
+        self.on_write_many(db, [(None, snapshot(loan)) for loan in loans])
+        return len(loans)
+
+    def checkout_many(self, db: Session, items: Sequence[CheckoutItem], *, loan_days: int = settings.LOAN_DAYS) -> BatchLoanReport:
+        """
+        Check out many (user, book) pairs in one transaction.
+
+        Books, users and open loans for the whole batch are read with one SELECT each;
+        availability is applied per book in a single UPDATE. Items that cannot be
+        checked out are reported and skipped, the rest are committed together.
+        """
+        book_ids = {item.book_id for item in items}
+        user_ids = {item.user_id for item in items}
+        available = dict(db.execute(select(Book.id, Book.available_copies).where(Book.id.in_(book_ids))).all())
+        known_users = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+        on_loan = set(db.execute(
+            select(Loan.user_id, Loan.book_id)
+            .where(Loan.return_date == None, tuple_(Loan.user_id, Loan.book_id).in_({(i.user_id, i.book_id) for i in items}))
+        ).all())
+
+        due_date = date.today() + timedelta(days=loan_days)
+        results, loans, taken = [], [], Counter()
+        for index, item in enumerate(items):
+            error = None
+            if item.book_id not in available:
+                error = "Book not found"
+            elif item.user_id not in known_users:
+                error = "User not found"
+            elif (item.user_id, item.book_id) in on_loan:
+                error = "Book already on loan to this user"
+            elif available[item.book_id] - taken[item.book_id] <= 0:
+                error = "No available copies for this book"
+            results.append(BatchItemResult(index=index, ok=error is None, error=error))
+            if error is None:
+                on_loan.add((item.user_id, item.book_id))
+                taken[item.book_id] += 1
+                loans.append((index, Loan(user_id=item.user_id, book_id=item.book_id, due_date=due_date)))
+
+        db.add_all(loan for _, loan in loans)
+        db.flush()
+        self.on_write_many(db, [(None, snapshot(loan)) for _, loan in loans])
+        if not crud_book.adjust_availability(db, {book_id: -n for book_id, n in taken.items()}):
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="Availability changed during the batch; retry it")
+        commit(db)
+        return self._report(db, results, loans)
+
+    def return_many(self, db: Session, loan_ids: Sequence[int]) -> BatchLoanReport:
+        """
+        Return many loans in one transaction (one SELECT, one availability UPDATE); per-id outcomes.
+        Returned copies serve each book's waiting list first, as in `return_book`. If a book cannot
+        take its copies back (already at total_copies), the whole batch is rolled back with a 409.
+        """
+        found = {loan.id: loan for loan in db.scalars(select(Loan).where(Loan.id.in_(set(loan_ids))))}
+
+        today = date.today()
+        results, loans, befores, returned = [], [], {}, Counter()
+        for index, loan_id in enumerate(loan_ids):
+            loan = found.get(loan_id)
+            error = None
+            if loan is None:
+                error = "Loan not found"
+            elif loan.return_date is not None or loan_id in befores:
+                error = "Loan already returned"
+            results.append(BatchItemResult(index=index, ok=error is None, error=error))
+            if error is None:
+                befores[loan_id] = snapshot(loan)
+                returned[loan.book_id] += 1
+                loans.append((index, loan))
+
+        if loans:
+            closed = db.execute(
+                update(Loan)
+                .where(Loan.id.in_([loan.id for _, loan in loans]), Loan.return_date == None)
+                .values(return_date=today)
+            )
+            if closed.rowcount != len(loans):
+                db.rollback()
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                    detail="Loans were returned concurrently; retry the batch")
+        self.on_write_many(db, [(befores[loan.id], snapshot(loan)) for _, loan in loans])
+        if not crud_book.adjust_availability(db, {
+            book_id: copies - self.serve_waiting(db, book_id, copies) for book_id, copies in returned.items()
+        }):
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="A returned copy does not fit its book's total copies; nothing was returned")
+        commit(db)
+        return self._report(db, results, loans)
+
+    @staticmethod
+    def _report(db: Session, results: List[BatchItemResult], loans: List[Tuple[int, Loan]]) -> BatchLoanReport:
+        """Attach the written loans to their results, reloading any expired by a commit with one SELECT."""
+        expired = [loan.id for _, loan in loans if inspect(loan).expired]
+        if expired:
+            db.scalars(select(Loan).where(Loan.id.in_(expired))).all()
+        for index, loan in loans:
+            results[index].loan = ShowLoan.model_validate(loan)
+        succeeded = sum(result.ok for result in results)
+        return BatchLoanReport(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+    def on_write(self, db: Session, before, after) -> None:
+        super().on_write(db, before, after)
+        counters.loan_changed(db, before, after)
+        overdue.loans_changed(db, [(before, after)])
+
+    def on_write_many(self, db: Session, changes) -> None:
+        self.mark_written(db)
+        counters.loans_changed(db, changes)
+        overdue.loans_changed(db, changes)
+
+    def query_active(self, db: Session, user_id: int | None = None, book_id: int | None = None) -> Query:
+        """Active (not yet returned) loans, optionally narrowed to a user and/or book."""
+        query = db.query(Loan).filter(Loan.return_date == None)
+        if user_id:
+            query = query.filter(Loan.user_id == user_id)
         if book_id:
-            return db.query(Loan).filter(and_(Loan.return_date == None, Loan.book_id == book_id)).all()
-        return db.query(Loan).filter(Loan.return_date == None).all()
+            query = query.filter(Loan.book_id == book_id)
+        return query
 
-    def get_user_loans(self, db: Session, user_id: int, active_only: bool = False) -> List[Loan]:
-        """Get all loans for a user."""
+    def get_active_loan(self, db: Session, user_id: int | None = None, book_id: int | None = None) -> Optional[List[Loan]]:
+        """Get active loans"""
+        return self.query_active(db, user_id=user_id, book_id=book_id).all()
+
+    def query_user_loans(self, db: Session, user_id: int, active_only: bool = False) -> Query:
         query = db.query(Loan).filter(Loan.user_id == user_id)
         if active_only:
             query = query.filter(Loan.return_date == None)
-        return query.order_by(Loan.borrow_date.desc()).all()
+        return query
+
+    def get_user_loans(self, db: Session, user_id: int, active_only: bool = False) -> List[Loan]:
+        """Get all loans for a user."""
+        return self.query_user_loans(db, user_id, active_only).order_by(Loan.borrow_date.desc()).all()
+
+    def list_user_loans(self, db: Session, *, user_id: int, limit: int, after: str | None = None,
+                        active_only: bool = False) -> Tuple[List[Loan], str | None]:
+        """Page through a user's loans, most recently borrowed first."""
+        return self.paginate(self.query_user_loans(db, user_id, active_only), limit=limit, after=after,
+                             sort=Loan.borrow_date, descending=True)
+
+    def list_overdue(self, db: Session, *, limit: int, after: str | None = None,
+                     user_id: int | None = None) -> Tuple[List[Loan], str | None]:
+        """Page through overdue loans (read from the overdue set), longest overdue first."""
+        return self.paginate(overdue.query_loans(db, user_id=user_id), limit=limit, after=after, sort=Loan.due_date)
 
 
 crud_loan = CRUDloan(Loan)
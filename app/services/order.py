@@ -1,28 +1,111 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from sqlalchemy import desc
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, desc, exists, func, or_, select, tuple_
+from sqlalchemy.orm import Query, Session, aliased, joinedload
 
 from app.core.enums import OrderStatus
+from app.db.models.loan import Loan
 from app.db.models.order import BookOrder
+from app.db.session import commit
 from app.schemas.order import CreateBookOrder, ShowBookOrder
-from app.services.base import CRUDBase
+from app.services import counters
+from app.services.base import CRUDBase, snapshot
 from . import crud_book
 
 
 class CRUDOrder(CRUDBase[BookOrder, CreateBookOrder, ShowBookOrder]):
-    def get_user_orders(self, db: Session, user_id: int) -> List[BookOrder]:
-        """Get all orders for a specific user."""
+    def query_user_orders(self, db: Session, user_id: int) -> Query:
         return db.query(self.model).options(joinedload(self.model.book)).filter(
             self.model.user_id == user_id
-        ).order_by(desc(self.model.order_date)).all()
+        )
 
-    def get_waiting_orders_by_book(self, db: Session, book_id: int) -> List[BookOrder]:
-        """Get waiting orders for a specific book, ordered by priority and date."""
-        return db.query(self.model).options(joinedload(self.model.book)).filter(
+    def get_user_orders(self, db: Session, user_id: int) -> List[BookOrder]:
+        """Get all orders for a specific user."""
+        return self.query_user_orders(db, user_id).order_by(desc(self.model.order_date)).all()
+
+    def list_orders(self, db: Session, *, limit: int, after: str | None = None,
+                    user_id: int | None = None) -> Tuple[List[BookOrder], str | None]:
+        """Page through orders (all, or one user's), newest first.
+
+        Keyed on the id, which grows with `order_date`, so the cursor stays exact.
+        """
+        q = self.query_user_orders(db, user_id) if user_id else db.query(self.model)
+        return self.paginate(q, limit=limit, after=after, descending=True)
+
+    def query_waiting(self, db: Session, book_id: int) -> Query:
+        """A book's waiting list in queue order (priority, then first come), read straight off `ix_book_orders_queue`."""
+        return db.query(self.model).filter(
             self.model.book_id == book_id,
             self.model.status == OrderStatus.WAITING
-        ).order_by(desc(self.model.priority), self.model.order_date).all()
+        ).order_by(desc(self.model.priority), self.model.order_date, self.model.id)
+
+    def get_waiting_orders_by_book(self, db: Session, book_id: int) -> List[BookOrder]:
+        """Get waiting orders for a specific book, ordered by priority and date (with each order's user)."""
+        return self.query_waiting(db, book_id).options(joinedload(self.model.user)).all()
+
+    def count_waiting(self, db: Session, book_id: int) -> int:
+        return db.scalar(select(func.count()).where(
+            self.model.book_id == book_id, self.model.status == OrderStatus.WAITING
+        ))
+
+    def position(self, db: Session, order: BookOrder) -> int | None:
+        """
+        1-based place of a WAITING order in its book's queue (None otherwise).
+
+        Counts the orders ahead of it with one range scan of the queue index, stopping at
+        the order itself; neither the table nor the rest of the queue is read. The order is
+        compared with its own stored row (joined by id), not with bound Python values:
+        `order_date` is stored by SQLite as text, and a bound datetime renders differently.
+        """
+        if order.status != OrderStatus.WAITING:
+            return None
+        model, me = self.model, aliased(self.model)
+        ahead = db.scalar(select(func.count(model.id)).join(me, me.id == order.id).where(
+            model.book_id == me.book_id,
+            model.status == OrderStatus.WAITING,
+            or_(
+                model.priority > me.priority,
+                and_(model.priority == me.priority,
+                     tuple_(model.order_date, model.id) < tuple_(me.order_date, me.id)),
+            ),
+        ))
+        return ahead + 1
+
+    def fulfil_next(self, db: Session, book_id: int, copies: int = 1) -> List[BookOrder]:
+        """
+        Pop up to `copies` orders off the head of a book's waiting list and mark them FULFILLED, without committing.
+
+        Users who already hold an open loan of the book are passed over (their orders keep
+        waiting). The head rows are locked (`FOR UPDATE SKIP LOCKED` where the database has
+        it; SQLite's single writer already serializes this), so two returns never hand a
+        copy to the same order.
+        """
+        has_copy = exists().where(
+            Loan.user_id == self.model.user_id, Loan.book_id == self.model.book_id, Loan.return_date == None
+        )
+        heads = (
+            self.query_waiting(db, book_id)
+            .filter(~has_copy)
+            .limit(copies)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        changes = []
+        for order in heads:
+            before = snapshot(order)
+            order.status = OrderStatus.FULFILLED
+            changes.append((before, snapshot(order)))
+        db.flush()
+        self.on_write_many(db, changes)
+        return heads
+
+    def on_write(self, db: Session, before, after) -> None:
+        super().on_write(db, before, after)
+        counters.order_changed(db, before, after)
+
+    def on_write_many(self, db: Session, changes) -> None:
+        self.mark_written(db)
+        counters.orders_changed(db, changes)
 
     def get_user_order_for_book(self, db: Session, user_id: int, book_id: int) -> Optional[BookOrder]:
         """Check if user has an active order for a specific book."""
@@ -56,11 +139,9 @@ class CRUDOrder(CRUDBase[BookOrder, CreateBookOrder, ShowBookOrder]):
 
         db_obj = self.model(**order_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        
-        # Load the book relationship for the response
-        db.refresh(db_obj, ['book'])
+        db.flush()
+        self.on_write(db, None, snapshot(db_obj))
+        commit(db)
         return db_obj
 
     def cancel_order(self, db: Session, *, order_id: int, user_id: int) -> BookOrder:
@@ -76,9 +157,10 @@ class CRUDOrder(CRUDBase[BookOrder, CreateBookOrder, ShowBookOrder]):
         if order.status != OrderStatus.WAITING:
             raise ValueError("Can only cancel waiting orders")
 
+        before = snapshot(order)
         order.status = OrderStatus.CANCELLED
-        db.commit()
-        db.refresh(order)
+        self.on_write(db, before, snapshot(order))
+        commit(db)
         return order
 
 
@@ -0,0 +1,143 @@
+"""
+Overdue Loans
+-------------
+
+`overdue_loans` holds every open loan past its due date, so overdue lookups read
+that table (as large as the overdue set) instead of checking all open loans
+against today.
+
+It is kept in step two ways:
+- writes: `loans_changed` runs from the loan service's `on_write` hook inside the write's
+  transaction, so returning a loan, or moving its due date, adds or drops its row;
+- time: `refresh` adds the open loans that fell due since the last run (a range search
+  on the partial `ix_loans_open_due_date` index) and drops rows whose loan was returned
+  or deleted outside the service layer. `overdue_worker` runs it whenever the date changes.
+
+Functions:
+- refresh(db, today, since)  → add loans due in [since, today), drop stale rows; returns counts
+- loans_changed(db, changes) → apply loan (before, after) snapshots to the set
+- query_loans(db, user_id)   → overdue open loans, optionally of one user
+- count_users(db)            → active users with at least one overdue loan
+"""
+
+import threading
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, distinct, exists, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.models.counter import OverdueLoan
+from app.db.models.loan import Loan
+from app.db.models.user import User
+from app.db.session import SessionLocal, upsert
+
+Snapshot = Optional[Dict[str, object]]
+
+
+def refresh(db: Session, today: date | None = None, since: date | None = None) -> Dict[str, int]:
+    """Add open loans due before `today` (and on/after `since`, when given), drop stale rows, commit."""
+    today = today or date.today()
+    due = select(Loan.id, Loan.user_id, Loan.due_date).where(Loan.return_date == None, Loan.due_date < today)
+    if since is not None:
+        due = due.where(Loan.due_date >= since)
+    added = db.execute(
+        upsert(db, OverdueLoan).from_select(["loan_id", "user_id", "due_date"], due).on_conflict_do_nothing()
+    ).rowcount
+
+    still_overdue = exists().where(
+        Loan.id == OverdueLoan.loan_id, Loan.return_date == None, Loan.due_date < today
+    )
+    removed = db.execute(delete(OverdueLoan).where(~still_overdue)).rowcount
+    db.info.setdefault("written_tables", set()).add(OverdueLoan.__tablename__)
+    db.commit()
+    return {"added": added, "removed": removed}
+
+
+def loans_changed(db: Session, changes: Iterable[Tuple[Snapshot, Snapshot]], today: date | None = None) -> None:
+    """Add/drop the loans in `changes` whose overdue state the write decides; loans due in the future cost nothing."""
+    today = today or date.today()
+    add, drop = {}, set()
+    for before, after in changes:
+        if after is not None and after["return_date"] is None and after["due_date"] < today:
+            add[after["id"]] = {"loan_id": after["id"], "user_id": after["user_id"], "due_date": after["due_date"]}
+        elif before is not None and before["return_date"] is None and before["due_date"] < today:
+            drop.add(before["id"])
+    if drop:
+        db.execute(delete(OverdueLoan).where(OverdueLoan.loan_id.in_(drop)))
+    if add:
+        stmt = upsert(db, OverdueLoan)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[OverdueLoan.loan_id],
+            set_={"user_id": stmt.excluded.user_id, "due_date": stmt.excluded.due_date},
+        ), list(add.values()))
+
+
+def query_loans(db: Session, user_id: int | None = None) -> Query:
+    """Overdue loans (still open), read through `overdue_loans`."""
+    q = db.query(Loan).join(OverdueLoan, OverdueLoan.loan_id == Loan.id).filter(Loan.return_date == None)
+    if user_id:
+        q = q.filter(OverdueLoan.user_id == user_id)
+    return q
+
+
+def count_users(db: Session) -> int:
+    return db.scalar(
+        select(func.count(distinct(OverdueLoan.user_id)))
+        .join(Loan, Loan.id == OverdueLoan.loan_id)
+        .join(User, User.id == OverdueLoan.user_id)
+        .where(Loan.return_date == None, User.is_active == True)
+    )
+
+
+class OverdueWorker:
+    """Background thread running `refresh()` at start-up and then whenever the date has changed."""
+
+    def __init__(self, *, interval_seconds: int):
+        self.interval = interval_seconds
+        self.runs = 0
+        self.failed = 0
+        self.refreshed_for: date | None = None
+        self.last_result: Dict[str, int] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="overdue-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"runs": self.runs, "failed": self.failed, **(self.last_result or {})}
+
+    def run_once(self, today: date | None = None) -> Dict[str, int] | None:
+        """Refresh from the last date refreshed for; None if that is already `today`."""
+        today = today or date.today()
+        if self.refreshed_for == today:
+            return None
+        with SessionLocal() as db:
+            self.last_result = refresh(db, today, since=self.refreshed_for)
+        self.refreshed_for = today
+        self.runs += 1
+        return self.last_result
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except SQLAlchemyError:
+                self.failed += 1
+            self._stop.wait(self.interval)
+
+
+overdue_worker = OverdueWorker(interval_seconds=settings.OVERDUE_CHECK_INTERVAL_SECONDS)
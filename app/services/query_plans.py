@@ -0,0 +1,169 @@
+"""
+Query Plan Checks
+-----------------
+
+Runs the service layer's hot-path calls against a scratch in-memory SQLite database
+built from the models, and asks SQLite how it executes every statement they issue
+(`EXPLAIN QUERY PLAN`). A statement that walks a whole table (or a whole index)
+instead of searching one is reported, so a dropped index or a predicate rewritten
+into a form no index can serve shows up before it reaches a real database.
+
+- CASES              → (name, service call) for the hot paths
+- explain(conn, sql) → the plan's detail lines for one statement
+- full_scans(plan)   → plan lines that scan a table end to end
+- check()            → run every case on a fresh database; one PlanCheck per case
+
+`python -m app.cli check-query-plans` prints the plans and exits non-zero on a full scan.
+Aggregate reports (books by genre, top borrowers, ...) read whole tables by design
+and are not listed.
+"""
+
+import re
+from datetime import date, timedelta
+from typing import Callable, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.enums import OrderStatus
+from app.db import fts
+from app.db.models import Book, BookOrder, Loan, User
+from app.db.session import Base, make_engine
+from app.schemas.loans import CheckoutItem
+from app.services import overdue, retention
+from app.services.base import encode_cursor
+from app.services.book import crud_book
+from app.services.loan import crud_loan
+from app.services.order import crud_order
+from app.services.statistics import LibraryStatisticsService
+from app.services.user import crud_user
+
+# Tables whose every row is part of the answer: a handful of counters, and the
+# precomputed overdue set (sized by overdue loans, not by the loan table).
+ALWAYS_SCANNABLE = frozenset({"library_counters", "overdue_loans"})
+PLANNED = ("SELECT", "WITH", "UPDATE", "DELETE")
+_ALIAS_SUFFIX = re.compile(r"_\d+$")
+
+
+class PlanCheck:
+    """Outcome of one case: every statement with its plan, and the full-scan lines among them."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.plans: List[Tuple[str, List[str]]] = []
+        self.scans: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.scans
+
+
+def explain(conn, statement: str, parameters: Sequence = ()) -> List[str]:
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters))]
+
+
+def full_scans(plan: Iterable[str], allowed: Iterable[str] = ALWAYS_SCANNABLE) -> List[str]:
+    """
+    `SCAN <table>` lines of a plan (with or without `USING [COVERING] INDEX`: either way
+    every entry is read). Subqueries, co-routines and FTS virtual tables are not tables;
+    aliases such as `users_1` count as their table.
+    """
+    plan = list(plan)
+    derived = {line.split(" ", 1)[1] for line in plan if line.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    scans = []
+    for line in plan:
+        if not line.startswith("SCAN ") or "VIRTUAL TABLE" in line or line == "SCAN CONSTANT ROW":
+            continue
+        target = line.split(" ")[1]
+        if target.startswith("(") or target in derived or _ALIAS_SUFFIX.sub("", target) in allowed:
+            continue
+        scans.append(line)
+    return scans
+
+
+def seed(db: Session) -> None:
+    """A few rows so every code path of the cases runs (open loans, a returned one, a waiting order)."""
+    today = date.today()
+    db.execute(insert(User), [
+        {"id": i, "full_name": f"user {i}", "email": f"user{i}@example.com", "phone_number": f"plan-{i}",
+         "password": "x", "is_active": True} for i in (1, 2, 3)
+    ])
+    db.execute(insert(Book), [
+        {"id": 1, "title": "Dune", "author": "Herbert", "genre": "scifi", "total_copies": 2, "available_copies": 0},
+        {"id": 2, "title": "Emma", "author": "Austen", "genre": "classic", "total_copies": 2, "available_copies": 2},
+    ])
+    db.execute(insert(Loan), [
+        {"id": 1, "user_id": 1, "book_id": 1, "borrow_date": today, "due_date": today - timedelta(days=1)},
+        {"id": 2, "user_id": 2, "book_id": 1, "borrow_date": today, "due_date": today + timedelta(days=7)},
+        {"id": 3, "user_id": 1, "book_id": 2, "borrow_date": today, "due_date": today, "return_date": today},
+    ])
+    db.execute(insert(BookOrder).values(id=1, user_id=3, book_id=1, priority=1, status=OrderStatus.WAITING,
+                                        order_date=func.now()))  # stored the way production rows are
+    db.commit()
+
+
+CASES: List[Tuple[str, Callable[[Session], object]]] = [
+    ("crud_user.get_by(email)", lambda db: crud_user.get_by(db, email="user1@example.com")),
+    ("crud_loan.get_active_loan(user, book)", lambda db: crud_loan.get_active_loan(db, user_id=1, book_id=1)),
+    ("crud_loan.get_active_loan(user)", lambda db: crud_loan.get_active_loan(db, user_id=1)),
+    ("crud_loan.get_active_loan(book)", lambda db: crud_loan.get_active_loan(db, book_id=1)),
+    ("crud_loan.list_user_loans", lambda db: crud_loan.list_user_loans(db, user_id=1, limit=20, active_only=True)),
+    ("crud_loan.create_checkout", lambda db: crud_loan.create_checkout(db, user_id=3, book_id=2)),
+    ("crud_loan.checkout_many", lambda db: crud_loan.checkout_many(db, [CheckoutItem(user_id=2, book_id=2)])),
+    ("crud_loan.return_book (serves the waiting list)", lambda db: crud_loan.return_book(db, 1)),
+    ("crud_loan.return_many", lambda db: crud_loan.return_many(db, [1, 2])),
+    ("overdue.query_loans(user)", lambda db: overdue.query_loans(db, user_id=1).all()),
+    ("overdue.count_users", lambda db: overdue.count_users(db)),
+    ("overdue.refresh (since yesterday)", lambda db: overdue.refresh(db, since=date.today() - timedelta(days=1))),
+    ("crud_order.get_waiting_orders_by_book", lambda db: crud_order.get_waiting_orders_by_book(db, 1)),
+    ("crud_order.position", lambda db: crud_order.position(db, db.get(BookOrder, 1))),
+    ("crud_order.get_user_order_for_book", lambda db: crud_order.get_user_order_for_book(db, 3, 1)),
+    ("crud_order.list_orders(user)", lambda db: crud_order.list_orders(db, user_id=3, limit=20)),
+    ("crud_book.search", lambda db: crud_book.search(db, "dune", limit=10)),
+    ("crud_book.search (next page)", lambda db: crud_book.search(db, "dune", limit=10, after=encode_cursor([-1.0, 1]))),
+    ("statistics.get_library_overview", lambda db: LibraryStatisticsService(db).get_library_overview()),
+    ("statistics.get_operational_statistics",
+     lambda db: LibraryStatisticsService(db).get_operational_statistics()),
+    ("retention.count_events_since",
+     lambda db: retention.count_events_since(db, retention.utcnow() - timedelta(hours=24))),
+]
+
+
+def scratch_engine() -> Engine:
+    """Fresh in-memory database with the full schema (tables, indexes, FTS)."""
+    engine = make_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    fts.ensure_book_search_index(engine)
+    return engine
+
+
+def run_case(name: str, call: Callable[[Session], object]) -> PlanCheck:
+    engine = scratch_engine()
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    with session_factory() as db:
+        seed(db)
+
+    statements: List[Tuple[str, Sequence]] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(PLANNED):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    with session_factory() as db:
+        call(db)
+    event.remove(engine, "before_cursor_execute", _capture)
+
+    result = PlanCheck(name)
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = explain(conn, statement, parameters)
+            result.plans.append((statement, plan))
+            result.scans += full_scans(plan)
+    engine.dispose()
+    return result
+
+
+def check(cases=CASES) -> List[PlanCheck]:
+    return [run_case(name, call) for name, call in cases]
@@ -0,0 +1,192 @@
+"""
+Event Retention
+---------------
+
+Keeps the `events` table bounded. Complete hours of raw events are aggregated into
+`event_rollups` (row count, estimated request count from the sample weights,
+status-class buckets, latency sum/max per method and path); raw rows older than `EVENT_RETENTION_DAYS` are then deleted in chunks of
+`EVENT_RETENTION_CHUNK_SIZE`, one short transaction each, so the request-event
+flusher is never locked out for long.
+
+The watermark is the hour after the newest rollup row: everything before it has been
+aggregated, and only rows before it are ever deleted. A rollup row is replaced, not
+added to, so aggregating an hour twice is harmless.
+
+Functions:
+- rolled_up_through(db)     → first hour not yet rolled up (None before the first rollup)
+- roll_up(db, now)          → aggregate the complete hours past the watermark
+- prune(db, now)            → delete rolled-up raw events past retention
+- count_events_since(db, t) → estimated requests since `t` (sample weights), from rollups plus the raw tail
+- run(now)                  → roll_up + prune in a fresh session (CLI and background job)
+- retention_worker          → background thread running `run` every EVENT_RETENTION_INTERVAL_SECONDS
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.event import Event, EventRollup
+from app.db.session import SessionLocal, upsert
+
+HOUR = timedelta(hours=1)
+METRICS = ("count", "estimated_count", "status_2xx", "status_3xx", "status_4xx", "status_5xx", "status_other",
+           "duration_ms_sum", "duration_ms_max")
+
+
+def utcnow() -> datetime:
+    """Naive UTC, matching how `events.timestamp` is stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def rolled_up_through(db: Session) -> datetime | None:
+    latest = db.scalar(select(func.max(EventRollup.hour)))
+    return latest + HOUR if latest is not None else None
+
+
+def roll_up(db: Session, now: datetime | None = None, *, batch_hours: int = 24) -> int:
+    """Aggregate complete hours past the watermark, committing every `batch_hours`; returns rollup rows written."""
+    until = floor_hour((now or utcnow()) - timedelta(seconds=settings.EVENT_ROLLUP_LAG_SECONDS))
+    start = rolled_up_through(db)
+    if start is None:
+        first = db.scalar(select(func.min(Event.timestamp)))
+        if first is None:
+            return 0
+        start = floor_hour(first)
+
+    written = 0
+    while start < until:
+        end = min(start + batch_hours * HOUR, until)
+        rows = _aggregate(db, start, end)
+        if rows:
+            stmt = upsert(db, EventRollup)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[EventRollup.hour, EventRollup.method, EventRollup.path],
+                set_={name: stmt.excluded[name] for name in METRICS},
+            ), rows)
+        db.commit()
+        written += len(rows)
+        start = end
+    return written
+
+
+def prune(db: Session, now: datetime | None = None, *, chunk_size: int = settings.EVENT_RETENTION_CHUNK_SIZE) -> int:
+    """Delete raw events older than the retention period that are already rolled up; returns rows deleted."""
+    watermark = rolled_up_through(db)
+    if watermark is None:
+        return 0
+    # Rows past the watermark are not in any rollup yet, whatever their age.
+    cutoff = min((now or utcnow()) - timedelta(days=settings.EVENT_RETENTION_DAYS), watermark)
+
+    deleted = 0
+    while True:
+        chunk = select(Event.id).where(Event.timestamp < cutoff).limit(chunk_size).scalar_subquery()
+        removed = db.execute(delete(Event).where(Event.id.in_(chunk))).rowcount
+        db.commit()
+        deleted += removed
+        if removed < chunk_size:
+            return deleted
+
+
+def count_events_since(db: Session, since: datetime) -> int:
+    """
+    Estimated requests from `since` onwards, each counted at its sample weight: rolled-up
+    hours that start at or after `since`, plus raw rows for the part of an hour before the
+    first of those and for everything past the watermark. Exact while the raw rows of
+    `since`'s hour are still kept (`since` within EVENT_RETENTION_DAYS).
+    """
+    weights = func.coalesce(func.sum(Event.sample_weight), 0)
+    watermark = rolled_up_through(db)
+    if watermark is None or watermark <= since:
+        return round(db.scalar(select(weights).where(Event.timestamp >= since)))
+    first_hour = floor_hour(since) if floor_hour(since) == since else floor_hour(since) + HOUR
+    rolled = db.scalar(
+        select(func.coalesce(func.sum(EventRollup.estimated_count), 0)).where(EventRollup.hour >= first_hour)
+    )
+    raw = db.scalar(select(weights).where(
+        or_(and_(Event.timestamp >= since, Event.timestamp < first_hour), Event.timestamp >= watermark)
+    ))
+    return round(rolled + raw)
+
+
+def run(now: datetime | None = None, session_factory=SessionLocal) -> Dict[str, int]:
+    with session_factory() as db:
+        rolled_up = roll_up(db, now)
+        deleted = prune(db, now)
+    return {"rolled_up": rolled_up, "deleted": deleted}
+
+
+def _aggregate(db: Session, start: datetime, end: datetime) -> List[dict]:
+    hour = func.strftime("%Y-%m-%d %H:00:00", Event.timestamp)
+    method = func.coalesce(Event.method, "")
+    path = func.coalesce(Event.meta_data["path"].as_string(), "")
+
+    def status_class(low: int):
+        return func.sum(case((Event.status_code.between(low, low + 99), 1), else_=0))
+
+    q = (
+        select(
+            hour, method, path,
+            func.count(Event.id),
+            func.sum(Event.sample_weight),
+            status_class(200), status_class(300), status_class(400), status_class(500),
+            func.sum(case((or_(Event.status_code == None, Event.status_code < 200, Event.status_code > 599), 1),
+                          else_=0)),
+            func.coalesce(func.sum(Event.duration_ms), 0),
+            func.max(Event.duration_ms),
+        )
+        .where(Event.timestamp >= start, Event.timestamp < end)
+        .group_by(hour, method, path)
+    )
+    return [
+        {"hour": datetime.fromisoformat(bucket), "method": row_method, "path": row_path, **dict(zip(METRICS, values))}
+        for bucket, row_method, row_path, *values in db.execute(q)
+    ]
+
+
+class RetentionWorker:
+    """Background thread running `run()` at start-up and then every `interval_seconds`."""
+
+    def __init__(self, *, interval_seconds: int):
+        self.interval = interval_seconds
+        self.runs = 0
+        self.failed = 0
+        self.last_result: Dict[str, int] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"runs": self.runs, "failed": self.failed, **(self.last_result or {})}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.last_result = run()
+                self.runs += 1
+            except SQLAlchemyError:
+                self.failed += 1
+            self._stop.wait(self.interval)
+
+
+retention_worker = RetentionWorker(interval_seconds=settings.EVENT_RETENTION_INTERVAL_SECONDS)
@@ -4,21 +4,29 @@ Statistics Service
 
 Service layer for generating library management statistics.
 Follows Single Responsibility Principle by separating different management concerns.
-Uses events data for comprehensive analytics.
+Uses events data for comprehensive analytics; request-event counts come from the
+hourly rollups plus the not yet rolled-up tail (see app.services.retention).
+
+Results are served through `CachedStatisticsService`: each method is cached for
+its `STATS_CACHE_TTLS` entry and dropped as soon as a service-layer write to a
+table it reads is committed.
 """
 
+import threading
 from datetime import datetime, timedelta
 
-from sqlalchemy import func, desc, and_
+from sqlalchemy import func, desc, event
 from sqlalchemy.orm import Session
 
-from app.core.enums import OrderStatus
+from app.core.config import settings
+from app.db.session import SessionLocal
+
 from app.db.models.book import Book
-from app.db.models.event import Event
 from app.db.models.loan import Loan
-from app.db.models.order import BookOrder
 from app.db.models.user import User
 from app.schemas.statistics import LibraryOverview, BookStatistics, UserStatistics, OperationalStats
+from app.services import counters, overdue, retention
+from app.utils import TTLCache
 
 
 class LibraryStatisticsService:
@@ -34,37 +42,22 @@ class LibraryStatisticsService:
     def get_library_overview(self) -> LibraryOverview:
         """
         Get overall library statistics for management dashboard.
+        Reads the incrementally maintained counters (see app.services.counters).
         
         Returns:
             LibraryOverview: Key library metrics
         """
-        total_books = sum(book.total_copies for book in self.db.query(Book))
-        total_users = self.db.query(User).filter(User.is_active == True).count()
-        total_loans = self.db.query(Loan).join(User).filter(User.is_active == True).count()
-
-        books_on_loan = self.db.query(Loan).join(User).filter(
-            User.is_active == True,
-            Loan.return_date == None
-        ).count()
-
-        available_books = max(0, total_books - books_on_loan)
-
-        today = datetime.now().date()
-        overdue_loans = self.db.query(Loan).join(User).filter(
-            User.is_active == True,
-            and_(
-                Loan.return_date == None,
-                Loan.due_date < today
-            )
-        ).count()
+        totals = counters.read(self.db)
+        total_books = totals[counters.TOTAL_COPIES]
+        books_on_loan = totals[counters.ON_LOAN]
 
         return LibraryOverview(
             total_books=total_books,
-            total_users=total_users,
-            total_loans=total_loans,
-            available_books=available_books,
+            total_users=totals[counters.ACTIVE_USERS],
+            total_loans=totals[counters.TOTAL_LOANS],
+            available_books=max(0, total_books - books_on_loan),
             books_on_loan=books_on_loan,
-            overdue_loans=overdue_loans
+            overdue_loans=counters.overdue(self.db, datetime.now().date())
         )
 
     def get_book_statistics(self) -> BookStatistics:
@@ -150,14 +143,7 @@ class LibraryStatisticsService:
             } for full_name, email, count in top_borrowers_query
         ]
 
-        today = datetime.now().date()
-        users_with_overdue = self.db.query(User.id).join(Loan).filter(
-            User.is_active == True,
-            and_(
-                Loan.return_date.is_(None),
-                Loan.due_date < today
-            )
-        ).distinct().count()
+        users_with_overdue = overdue.count_users(self.db)
 
         return UserStatistics(
             total_users=total_users,
@@ -178,23 +164,17 @@ class LibraryStatisticsService:
 
         loans_today = self.db.query(Loan).join(User).filter(
             User.is_active == True,
-            func.date(Loan.borrow_date) == today
+            Loan.borrow_date == today
         ).count()
 
         returns_today = self.db.query(Loan).join(User).filter(
             User.is_active == True,
-            func.date(Loan.return_date) == today
+            Loan.return_date == today
         ).count()
 
-        new_orders = self.db.query(BookOrder).join(User).filter(
-            User.is_active == True,
-            BookOrder.status == OrderStatus.WAITING
-        ).count()
+        new_orders = counters.read(self.db)[counters.WAITING_ORDERS]
 
-        last_24h = datetime.now() - timedelta(hours=24)
-        system_events_today = self.db.query(Event).filter(
-            Event.timestamp >= last_24h
-        ).count()
+        system_events_today = retention.count_events_since(self.db, retention.utcnow() - timedelta(hours=24))
 
         return OperationalStats(
             loans_today=loans_today,
@@ -204,9 +184,91 @@ class LibraryStatisticsService:
         )
 
 
-def get_statistics_service(db: Session) -> LibraryStatisticsService:
+class StatisticsCache:
+    """
+    Per-method result cache with table-driven invalidation.
+
+    `DEPENDS_ON` maps each cached method to the tables it reads. A write that
+    commits to one of them drops the entry. A generation counter stops a result
+    computed before the write from being stored after it.
+    """
+
+    DEPENDS_ON = {
+        "get_library_overview": ("overview", {"books", "loans", "users", "book_orders"}),
+        "get_book_statistics": ("books", {"books", "loans", "users"}),
+        "get_user_statistics": ("users", {"users", "loans", "overdue_loans"}),
+        "get_operational_statistics": ("operations", {"loans", "users", "book_orders"}),
+    }
+
+    def __init__(self, ttls: dict[str, float]):
+        self.ttls = ttls
+        self._results = TTLCache(maxsize=len(self.DEPENDS_ON), ttl=max(ttls.values(), default=0))
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, method: str, compute):
+        name, _ = self.DEPENDS_ON[method]
+        cached = self._results.get(method)
+        if cached is not None:
+            return cached
+        generation = self._generation
+        result = compute()
+        with self._lock:
+            if generation == self._generation:
+                self._results.set(method, result, ttl=self.ttls.get(name, 0))
+        return result
+
+    def invalidate(self, tables) -> None:
+        tables = set(tables)
+        with self._lock:
+            self._generation += 1
+            for method, (_, depends_on) in self.DEPENDS_ON.items():
+                if depends_on & tables:
+                    self._results.pop(method)
+
+    def clear(self) -> None:
+        self.invalidate(table for _, tables in self.DEPENDS_ON.values() for table in tables)
+
+
+statistics_cache = StatisticsCache(settings.STATS_CACHE_TTLS)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_statistics(session: Session) -> None:
+    """Drop cached statistics that read tables written in this transaction (see CRUDBase.on_write)."""
+    written = session.info.pop("written_tables", None)
+    if written:
+        statistics_cache.invalidate(written)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_written_tables(session: Session) -> None:
+    session.info.pop("written_tables", None)
+
+
+class CachedStatisticsService:
+    """LibraryStatisticsService behind `statistics_cache`; responses carry `generated_at`."""
+
+    def __init__(self, service: LibraryStatisticsService, cache: StatisticsCache = statistics_cache):
+        self.service = service
+        self.cache = cache
+
+    def get_library_overview(self) -> LibraryOverview:
+        return self.cache.get_or_compute("get_library_overview", self.service.get_library_overview)
+
+    def get_book_statistics(self) -> BookStatistics:
+        return self.cache.get_or_compute("get_book_statistics", self.service.get_book_statistics)
+
+    def get_user_statistics(self) -> UserStatistics:
+        return self.cache.get_or_compute("get_user_statistics", self.service.get_user_statistics)
+
+    def get_operational_statistics(self) -> OperationalStats:
+        return self.cache.get_or_compute("get_operational_statistics", self.service.get_operational_statistics)
+
+
+def get_statistics_service(db: Session) -> CachedStatisticsService:
     """
     Factory function for creating statistics service.
     Follows Dependency Injection pattern used in your project.
     """
-    return LibraryStatisticsService(db)
+    return CachedStatisticsService(LibraryStatisticsService(db))
@@ -0,0 +1,249 @@
+"""
+Synthetic Dataset
+-----------------
+
+Deterministic generator for production-sized test data. Rows are written straight
+into the tables with one executemany per chunk: no ORM objects, no per-row service
+hooks and no bcrypt per account (every user shares one precomputed hash). The same
+seed and sizes always produce the same rows.
+
+- users       → user 1 is an ADMIN, ~1% LIBRARIAN, the rest MEMBER (~2% inactive);
+                emails `user{id}@example.org`
+- books       → 1-5 copies each; popularity follows a Zipf law over a shuffled ranking
+- loans       → returned history over `days`, plus `open_ratio` still open (within each
+                book's copies, one per user and book), `overdue_ratio` of those past due
+- book_orders → half of those for books with every copy lent out are WAITING, the rest
+                FULFILLED/CANCELLED history
+- events      → request log over the last `event_days`, in timestamp order
+
+Afterwards the statistics counters, the overdue set and the search index are rebuilt
+from the loaded rows.
+
+- DatasetSpec → sizes and distribution parameters (`scaled()` shrinks or grows the sizes)
+- generate(engine, spec, password_hash, progress) → load an empty database; rows per table
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from itertools import accumulate, chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.enums import OrderStatus, UserRole
+from app.db.fts import ensure_book_search_index
+from app.db.models import Book, BookOrder, Event, Loan, User
+from app.services import counters, overdue
+
+WORDS = ("river", "night", "garden", "empire", "stone", "winter", "silver", "voyage", "shadow", "harbor",
+         "glass", "orchard", "signal", "crown", "ember", "tide", "atlas", "lantern", "meadow", "cipher")
+GENRES = ("fiction", "history", "science", "poetry", "travel", "children", "crime", "fantasy", "biography")
+# (method, path, weight, success status); ids in paths are filled in per event
+REQUESTS = (
+    ("GET", "/books/", 40, 200), ("GET", "/books/?q", 10, 200), ("GET", "/loans/active", 8, 200),
+    ("GET", "/auth/me", 12, 200), ("POST", "/auth/login", 6, 200), ("POST", "/loans/", 6, 201),
+    ("PUT", "/loans/return/{id}", 5, 200), ("GET", "/orders/my-orders", 5, 200),
+    ("GET", "/statistics/overview", 6, 200), ("GET", "/users/{id}", 2, 200),
+)
+LOAN_DAYS = 30
+
+
+class DatasetSpec:
+    """Sizes and distribution parameters; the defaults are production volumes."""
+
+    SIZES = ("users", "books", "loans", "orders", "events")
+
+    def __init__(self, *, users: int = 200_000, books: int = 1_000_000, loans: int = 10_000_000,
+                 orders: int = 500_000, events: int = 50_000_000, seed: int = 42, days: int = 730,
+                 event_days: int = 14, open_ratio: float = 0.05, overdue_ratio: float = 0.2,
+                 book_skew: float = 1.1, user_skew: float = 0.8, chunk_size: int = 50_000):
+        self.users = users
+        self.books = books
+        self.loans = loans
+        self.orders = orders
+        self.events = events
+        self.seed = seed
+        self.days = days
+        self.event_days = event_days
+        self.open_ratio = open_ratio
+        self.overdue_ratio = overdue_ratio
+        self.book_skew = book_skew
+        self.user_skew = user_skew
+        self.chunk_size = chunk_size
+
+    def scaled(self, factor: float) -> "DatasetSpec":
+        spec = DatasetSpec(**vars(self))
+        for name in self.SIZES:
+            setattr(spec, name, max(1, round(getattr(self, name) * factor)))
+        return spec
+
+
+class Zipf:
+    """Draws ids 1..n with P ∝ 1 / rank^s; ranks are shuffled, so popularity is unrelated to the id."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.cum_weights = list(accumulate(rank ** -s for rank in range(1, n + 1)))
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+        self.rng = rng
+
+    def sample(self, k: int) -> List[int]:
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+
+def generate(engine: Engine, spec: DatasetSpec, password_hash: str,
+             progress: Callable[[str, int, int], None] = lambda table, done, total: None) -> Dict[str, int]:
+    """Load `spec` into an empty database behind `engine`; raises ValueError if users or books exist."""
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    with session_factory() as db:
+        if db.scalar(select(func.count()).select_from(User)) or db.scalar(select(func.count()).select_from(Book)):
+            raise ValueError("the database already has users or books; generate into an empty one")
+
+    rng = random.Random(spec.seed)
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=12)
+    book_pick = Zipf(spec.books, spec.book_skew, rng)
+    user_pick = Zipf(spec.users, spec.user_skew, rng)
+    copies = bytearray(rng.randint(1, 5) for _ in range(spec.books + 1))
+    on_loan = bytearray(spec.books + 1)
+
+    # Open loans are planned first: they decide each book's available copies.
+    open_loans, holders = [], set()
+    wanted = min(round(spec.loans * spec.open_ratio), spec.loans)
+    for _ in range(8):
+        if len(open_loans) >= wanted:
+            break
+        for book_id, user_id in zip(book_pick.sample(wanted), user_pick.sample(wanted)):
+            if len(open_loans) >= wanted:
+                break
+            if on_loan[book_id] >= copies[book_id] or (user_id, book_id) in holders:
+                continue
+            on_loan[book_id] += 1
+            holders.add((user_id, book_id))
+            if rng.random() < spec.overdue_ratio:
+                borrowed = today - timedelta(days=rng.randint(LOAN_DAYS + 1, LOAN_DAYS + 90))
+            else:
+                borrowed = today - timedelta(days=rng.randint(0, LOAN_DAYS - 1))
+            open_loans.append({"user_id": user_id, "book_id": book_id, "borrow_date": borrowed,
+                               "due_date": borrowed + timedelta(days=LOAN_DAYS), "return_date": None})
+
+    def users() -> Iterator[dict]:
+        for user_id in range(1, spec.users + 1):
+            role = UserRole.ADMIN if user_id == 1 else (UserRole.LIBRARIAN if rng.random() < 0.01 else UserRole.MEMBER)
+            yield {"id": user_id, "full_name": f"User {user_id}", "email": f"user{user_id}@example.org",
+                   "phone_number": f"+1555{user_id:08d}", "join_date": today - timedelta(days=rng.randrange(spec.days)),
+                   "address": None, "password": password_hash, "role": role,
+                   "is_active": user_id == 1 or rng.random() >= 0.02}
+
+    def books() -> Iterator[dict]:
+        authors = max(1, spec.books // 8)
+        for book_id in range(1, spec.books + 1):
+            yield {"id": book_id, "title": " ".join(rng.sample(WORDS, rng.randint(2, 4))).title(),
+                   "author": f"Author {rng.randrange(authors)}", "published_year": rng.randint(1900, today.year),
+                   "genre": rng.choice(GENRES), "total_copies": copies[book_id],
+                   "available_copies": copies[book_id] - on_loan[book_id]}
+
+    def returned_loans() -> Iterator[dict]:
+        remaining = spec.loans - len(open_loans)
+        while remaining > 0:
+            size = min(spec.chunk_size, remaining)
+            remaining -= size
+            for book_id, user_id in zip(book_pick.sample(size), user_pick.sample(size)):
+                borrowed = today - timedelta(days=rng.randint(LOAN_DAYS + 1, max(spec.days, LOAN_DAYS + 1)))
+                yield {"user_id": user_id, "book_id": book_id, "borrow_date": borrowed,
+                       "due_date": borrowed + timedelta(days=LOAN_DAYS),
+                       "return_date": min(today, borrowed + timedelta(days=rng.randint(1, LOAN_DAYS + 15)))}
+
+    def orders() -> Iterator[dict]:
+        waiting = set()
+        for book_id, user_id in zip(book_pick.sample(spec.orders), user_pick.sample(spec.orders)):
+            lent_out = on_loan[book_id] >= copies[book_id] and rng.random() < 0.5
+            if lent_out and (user_id, book_id) not in holders and (user_id, book_id) not in waiting:
+                waiting.add((user_id, book_id))
+                status, age = OrderStatus.WAITING, rng.uniform(0, LOAN_DAYS)
+            else:
+                status = OrderStatus.FULFILLED if rng.random() < 0.7 else OrderStatus.CANCELLED
+                age = rng.uniform(LOAN_DAYS, spec.days)
+            yield {"user_id": user_id, "book_id": book_id, "order_date": now - timedelta(days=age),
+                   "priority": rng.choices((1, 2, 3), (80, 15, 5))[0], "status": status,
+                   "notify_when_available": "email"}
+
+    def events() -> Iterator[dict]:
+        weights = [kind[2] for kind in REQUESTS]
+        addresses = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}" for _ in range(4096)]
+        span = spec.event_days * 86_400
+        moment = now - timedelta(seconds=span)
+        gap = timedelta(seconds=span / max(spec.events, 1))
+        remaining = spec.events
+        while remaining > 0:
+            size = min(spec.chunk_size, remaining)
+            remaining -= size
+            for (method, path, _, ok), user_id in zip(rng.choices(REQUESTS, weights, k=size), user_pick.sample(size)):
+                moment += gap * rng.expovariate(1)
+                if "{id}" in path:
+                    path = path.replace("{id}", str(rng.randint(1, spec.users)))
+                roll = rng.random()
+                status = 500 if roll < 0.003 else (rng.choice((400, 401, 403, 404, 409)) if roll < 0.04 else ok)
+                signed_in = rng.random() < 0.7
+                yield {"timestamp": moment, "object_type": None, "status_code": status, "method": method,
+                       "duration_ms": int(rng.lognormvariate(2.3, 0.8)),
+                       "user_id": user_id if signed_in else None, "sample_weight": 1.0,
+                       "meta_data": {"path": path.split("?")[0], "method": method, "user_agent": "synthetic",
+                                     "remote_addr": addresses[user_id % 4096 if signed_in else rng.randrange(4096)]}}
+
+    # Secondary indexes are built once at the end (a sort) instead of row by row.
+    deferred = [index for model in (User, Book, Loan, BookOrder, Event)
+                for index in model.__table__.indexes if not index.unique]
+    with engine.begin() as conn:
+        for index in deferred:
+            index.drop(conn, checkfirst=True)
+    try:
+        loaded = {
+            "users": _load(engine, User, users(), spec.users, spec.chunk_size, progress),
+            "books": _load(engine, Book, books(), spec.books, spec.chunk_size, progress),
+            "loans": _load(engine, Loan, chain(returned_loans(), open_loans), spec.loans, spec.chunk_size, progress),
+            "book_orders": _load(engine, BookOrder, orders(), spec.orders, spec.chunk_size, progress),
+            "events": _load(engine, Event, events(), spec.events, spec.chunk_size, progress),
+        }
+    finally:
+        with engine.begin() as conn:
+            for index in deferred:
+                index.create(conn, checkfirst=True)
+
+    with session_factory() as db:
+        counters.rebuild(db)
+        overdue.refresh(db)
+    ensure_book_search_index(engine)
+    return loaded
+
+
+def _load(engine: Engine, model, rows: Iterable[dict], total: int, chunk_size: int,
+          progress: Callable[[str, int, int], None]) -> int:
+    """
+    Insert `rows` with one executemany (and transaction) per `chunk_size`; returns rows written.
+    Values go through the column types' bind processors straight to the driver, skipping
+    Core's per-row parameter handling, which costs more than SQLite's insert itself.
+    """
+    table = model.__table__
+    progress(table.name, 0, total)
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    compiled = insert(table).compile(dialect=engine.dialect, column_keys=list(first))
+    columns = list(compiled.positiontup)
+    processors = [table.c[name].type.bind_processor(engine.dialect) for name in columns]
+    converters = list(zip(columns, processors))
+
+    done = 0
+    rows = chain([first], rows)
+    while chunk := list(islice(rows, chunk_size)):
+        values = [tuple(processor(row[name]) if processor else row[name] for name, processor in converters)
+                  for row in chunk]
+        with engine.begin() as conn:
+            conn.exec_driver_sql(str(compiled), values)
+        done += len(values)
+        progress(table.name, done, total)
+    return done
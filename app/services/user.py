@@ -1,24 +1,52 @@
+from functools import partial
+from typing import Optional
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
 from app.core import security
+from app.core.config import settings
 from app.db.models.user import User
+from app.db.session import commit, on_commit
 from app.schemas.users import CreateUser, UpdateUser
-from app.services.base import CRUDBase
+from app.services import counters
+from app.services.base import CRUDBase, snapshot
+from app.utils import TTLCache
+
+# Column snapshots of recently authenticated users, keyed by user id.
+# Entries are dropped when an update/remove commits; other workers catch up within the TTL.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
 
 
 class CRUDuser(CRUDBase[User, CreateUser, UpdateUser]):
 
+    def get_cached(self, db: Session, id: int) -> Optional[User]:
+        """Get a user by id, served from `user_cache` without a SELECT when possible."""
+        values = user_cache.get(id)
+        if values is None:
+            db_obj = self.get(db, id)
+            if db_obj:
+                user_cache.set(id, snapshot(db_obj))
+            return db_obj
+
+        cached = User(**values)
+        make_transient_to_detached(cached)
+        return db.merge(cached, load=False)
+
     def create(self, db, *, obj_in: CreateUser) -> User:
         data = obj_in.model_dump(exclude={"password"})
         plain = obj_in.password.get_secret_value()
         hashed = security.get_password_hash(plain)
         db_obj = User(**data, password=hashed)
         db.add(db_obj);
-        db.commit();
-        db.refresh(db_obj)
+        db.flush();
+        self.on_write(db, None, snapshot(db_obj))
+        commit(db)
         return db_obj
 
     def update(self, db, *, db_obj: User, obj_in: UpdateUser | dict) -> User:
         if not isinstance(obj_in, dict):
             obj_in = obj_in.model_dump(exclude_unset=True)
+        before = snapshot(db_obj)
         if "password" in obj_in and obj_in["password"] is not None:
             plain = obj_in["password"].get_secret_value()
             db_obj.password = security.get_password_hash(plain)
@@ -26,9 +54,29 @@ class CRUDuser(CRUDBase[User, CreateUser, UpdateUser]):
         for k, v in obj_in.items():
             setattr(db_obj, k, v)
         db.add(db_obj);
-        db.commit();
-        db.refresh(db_obj)
+        db.flush();
+        self.on_write(db, before, snapshot(db_obj))
+        on_commit(db, partial(user_cache.pop, db_obj.id))
+        commit(db)
         return db_obj
 
+    def set_password_hash(self, db: Session, *, db_obj: User, hashed: str) -> User:
+        """Store an already computed hash (e.g. a login upgrading the bcrypt cost)."""
+        before = snapshot(db_obj)
+        db_obj.password = hashed
+        db.flush()
+        self.on_write(db, before, snapshot(db_obj))
+        on_commit(db, partial(user_cache.pop, db_obj.id))
+        commit(db)
+        return db_obj
+
+    def on_write(self, db: Session, before, after) -> None:
+        super().on_write(db, before, after)
+        counters.user_changed(db, before, after)
+
+    def remove(self, db, *, id: int) -> User:
+        on_commit(db, partial(user_cache.pop, id))
+        return super().remove(db, id=id)
+
 
 crud_user = CRUDuser(User)
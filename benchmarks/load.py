@@ -0,0 +1,310 @@
+"""
+Endpoint load benchmark
+-----------------------
+
+Seeds a throwaway SQLite file (books, members, an admin, some open loans), boots the
+app from `app.main.main()` and drives a weighted mix of workloads for a fixed time:
+
+- browse   → GET /books/ (keyset pages) and GET /books/?q= (full-text search)
+- login    → POST /auth/login as a member
+- checkout → POST /loans/ then PUT /loans/return/{id}
+- stats    → GET /statistics/overview and /statistics/operations
+
+Requests run in-process (httpx ASGITransport, default) or against a local uvicorn
+server started for the run (`--mode uvicorn`). Prints, and with `--output` writes,
+JSON with requests/s, p50/p95/p99 and status counts per endpoint, tagged with the
+git commit. `--compare old.json` reports per-endpoint changes against an earlier
+result and exits 1 if any p95 or the total throughput regressed by more than
+`--max-regression` percent.
+
+    python -m benchmarks.load --duration 30 --concurrency 16 --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.load --mode uvicorn --compare results/main.json
+
+Needs httpx (`pip install httpx`); `--mode uvicorn` also needs uvicorn.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "benchmark"
+GENRES = ("fiction", "history", "science", "poetry", "travel", "children", "crime", "fantasy")
+WORDS = ("river", "night", "garden", "empire", "stone", "winter", "silver", "voyage", "shadow", "harbor")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load after warm-up")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of untimed load first")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--mix", default="browse=50,login=5,checkout=20,stats=25",
+                        help="workload weights, e.g. browse=50,login=5,checkout=20,stats=25")
+    parser.add_argument("--books", type=int, default=5_000, help="books to seed")
+    parser.add_argument("--users", type=int, default=1_000, help="members to seed")
+    parser.add_argument("--open-loans", type=int, default=2_000, help="open loans to seed")
+    parser.add_argument("--rounds", type=int, default=None, help="BCRYPT_ROUNDS for the run")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and workload")
+    parser.add_argument("--output", help="write the JSON result here")
+    parser.add_argument("--compare", help="earlier JSON result to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95/throughput regression, %%")
+    return parser.parse_args()
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in WORKLOADS:
+            raise SystemExit(f"unknown workload {name!r} (choose from {', '.join(WORKLOADS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": round(pick(0.50), 2), "p95": round(pick(0.95), 2), "p99": round(pick(0.99), 2),
+            "mean": round(statistics.fmean(ordered), 2), "max": round(ordered[-1], 2)}
+
+
+def seed_database(args) -> None:
+    """Bulk-insert the dataset (one password hash shared by every account) and build counters/search."""
+    from sqlalchemy import insert
+
+    from app.core.enums import UserRole
+    from app.core.security import get_password_hash
+    from app.db.fts import ensure_book_search_index
+    from app.db.models import Book, Loan, User
+    from app.db.session import Base, SessionLocal, engine
+    from app.services import counters, overdue
+
+    rng = random.Random(args.seed)
+    Base.metadata.create_all(bind=engine)
+    password = get_password_hash(PASSWORD)
+    today = date.today()
+    copies = [rng.randint(1, 5) for _ in range(args.books)]
+    on_loan, holders, loans = Counter(), set(), []
+    while len(loans) < min(args.open_loans, sum(copies)):
+        user_id, book_id = rng.randint(2, args.users + 1), rng.randint(1, args.books)
+        if on_loan[book_id] < copies[book_id - 1] and (user_id, book_id) not in holders:
+            on_loan[book_id] += 1
+            holders.add((user_id, book_id))
+            borrowed = today - timedelta(days=rng.randrange(60))
+            loans.append({"user_id": user_id, "book_id": book_id, "borrow_date": borrowed,
+                          "due_date": borrowed + timedelta(days=30)})
+
+    with SessionLocal() as db:
+        db.execute(insert(User), [
+            {"full_name": "bench admin", "email": "admin@bench.example", "phone_number": "bench-admin",
+             "password": password, "role": UserRole.ADMIN, "is_active": True, "join_date": today},
+            *({"full_name": f"member {i}", "email": f"member{i}@bench.example", "phone_number": f"bench-{i}",
+               "password": password, "role": UserRole.MEMBER, "is_active": True,
+               "join_date": today - timedelta(days=rng.randrange(720))} for i in range(args.users)),
+        ])
+        db.execute(insert(Book), [
+            {"title": " ".join(rng.sample(WORDS, 3)).title(), "author": f"Author {rng.randrange(args.books // 5 + 1)}",
+             "published_year": rng.randrange(1900, 2025), "genre": rng.choice(GENRES),
+             "total_copies": total, "available_copies": total - on_loan[book_id]}
+            for book_id, total in enumerate(copies, start=1)
+        ])
+        db.execute(insert(Loan), loans)
+        db.commit()
+        counters.rebuild(db)
+        overdue.refresh(db)
+    ensure_book_search_index(engine)
+
+
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.latency_ms = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    async def call(self, client, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as e:  # transport errors count against the endpoint, the run goes on
+            response, status = None, type(e).__name__
+        if self.recording:
+            self.latency_ms[label].append((time.perf_counter() - start) * 1000)
+            self.statuses[label][str(status)] += 1
+        return response
+
+
+async def browse(client, rec: Recorder, rng: random.Random, ctx: dict):
+    if rng.random() < 0.3:
+        await rec.call(client, "GET /books/?q", "GET", "/books/", params={"q": rng.choice(WORDS), "limit": 20},
+                       headers=ctx["admin"])
+        return
+    response = await rec.call(client, "GET /books/", "GET", "/books/", params={"limit": 50}, headers=ctx["admin"])
+    cursor = response.headers.get("x-next-cursor") if response is not None else None
+    if cursor and rng.random() < 0.5:
+        await rec.call(client, "GET /books/ (next page)", "GET", "/books/", params={"limit": 50, "after": cursor},
+                       headers=ctx["admin"])
+
+
+async def login(client, rec: Recorder, rng: random.Random, ctx: dict):
+    email = f"member{rng.randrange(ctx['users'])}@bench.example"
+    await rec.call(client, "POST /auth/login", "POST", "/auth/login", data={"username": email, "password": PASSWORD})
+
+
+async def checkout(client, rec: Recorder, rng: random.Random, ctx: dict):
+    today = date.today()
+    payload = {"user_id": rng.randint(2, ctx["users"] + 1), "book_id": rng.randint(1, ctx["books"]),
+               "borrow_date": today.isoformat(), "due_date": (today + timedelta(days=30)).isoformat()}
+    response = await rec.call(client, "POST /loans/", "POST", "/loans/", json=payload, headers=ctx["admin"])
+    if response is not None and response.status_code == 201:
+        await rec.call(client, "PUT /loans/return/{id}", "PUT", f"/loans/return/{response.json()['id']}",
+                       headers=ctx["admin"])
+
+
+async def stats(client, rec: Recorder, rng: random.Random, ctx: dict):
+    name = rng.choice(("overview", "operations"))
+    await rec.call(client, f"GET /statistics/{name}", "GET", f"/statistics/{name}", headers=ctx["admin"])
+
+
+WORKLOADS = {"browse": browse, "login": login, "checkout": checkout, "stats": stats}
+
+
+async def drive(client, args, mix: dict) -> dict:
+    response = await client.post("/auth/login", data={"username": "admin@bench.example", "password": PASSWORD})
+    response.raise_for_status()
+    ctx = {"admin": {"Authorization": f"Bearer {response.json()['access_token']}"},
+           "users": args.users, "books": args.books}
+    rec = Recorder()
+    names, weights = list(mix), list(mix.values())
+
+    async def virtual_user(n: int, until: float):
+        rng = random.Random(args.seed * 1_000 + n)
+        while time.perf_counter() < until:
+            await WORKLOADS[rng.choices(names, weights)[0]](client, rec, rng, ctx)
+
+    await asyncio.gather(*(virtual_user(n, time.perf_counter() + args.warmup) for n in range(args.concurrency)))
+    rec.recording = True
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(n, start + args.duration) for n in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    endpoints = {
+        label: {"requests": len(samples), "rps": round(len(samples) / elapsed, 2),
+                "latency_ms": percentiles(samples), "statuses": dict(rec.statuses[label])}
+        for label, samples in sorted(rec.latency_ms.items())
+    }
+    total = sum(len(samples) for samples in rec.latency_ms.values())
+    errors = sum(n for counts in rec.statuses.values() for status, n in counts.items() if status[0] not in "1234")
+    return {"elapsed_s": round(elapsed, 3), "requests": total, "rps": round(total / elapsed, 2), "errors": errors,
+            "endpoints": endpoints}
+
+
+async def run_inprocess(args, mix: dict) -> dict:
+    import httpx
+    from app.main import main
+
+    app = main()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await drive(client, args, mix)
+
+
+async def run_uvicorn(args, mix: dict) -> dict:
+    import httpx
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:main", "--factory", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            for _ in range(300):
+                if server.poll() is not None:
+                    raise SystemExit(f"uvicorn exited with {server.returncode}")
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            return await drive(client, args, mix)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> tuple[dict, bool]:
+    """Per-endpoint p95 and total throughput change in percent (positive = slower / fewer requests)."""
+    change = lambda new, old: round((new - old) / old * 100, 1) if old else None
+    report, regressed = {}, False
+    for label, result in current["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(label)
+        if old is None:
+            continue
+        delta = change(result["latency_ms"]["p95"], old["latency_ms"]["p95"])
+        report[label] = {"p95_ms": [old["latency_ms"]["p95"], result["latency_ms"]["p95"]], "p95_change_pct": delta}
+        regressed |= delta is not None and delta > max_regression
+    throughput = change(baseline["rps"], current["rps"])
+    report["total"] = {"rps": [baseline["rps"], current["rps"]], "rps_drop_pct": throughput}
+    regressed |= throughput is not None and throughput > max_regression
+    return report, regressed
+
+
+def main():
+    args = parse_args()
+    mix = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix="load-bench-")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    if args.rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    sys.path.insert(0, ROOT)
+
+    seed_database(args)
+    run = run_uvicorn if args.mode == "uvicorn" else run_inprocess
+    result = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: getattr(args, key) for key in ("mode", "duration", "concurrency", "books", "users",
+                                                      "open_loans", "seed")} | {"mix": mix},
+        **asyncio.run(run(args, mix)),
+    }
+    regressed = False
+    if args.compare:
+        with open(args.compare) as f:
+            result["comparison"], regressed = compare(result, json.load(f), args.max_regression)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
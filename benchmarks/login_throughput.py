@@ -0,0 +1,116 @@
+"""
+Login throughput benchmark
+--------------------------
+
+Fires concurrent POST /auth/login requests at an in-process app (fresh SQLite
+database) while a probe keeps calling GET /books/, and prints login throughput,
+login latency, probe latency and the hashing pool's queue-time stats as JSON.
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 32 --pool-size 4 --rounds 12
+
+Needs httpx (`pip install httpx`). Run it once with `--pool-size 0` (hash in the
+request thread, the old behaviour) to compare.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="total login requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="logins in flight at once")
+    parser.add_argument("--users", type=int, default=20, help="distinct accounts to log in as")
+    parser.add_argument("--pool-size", type=int, default=None, help="HASH_POOL_SIZE (0 = hash inline)")
+    parser.add_argument("--rounds", type=int, default=None, help="BCRYPT_ROUNDS")
+    return parser.parse_args()
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": round(pick(0.50), 2), "p95": round(pick(0.95), 2), "p99": round(pick(0.99), 2),
+            "max": round(ordered[-1], 2), "mean": round(statistics.fmean(ordered), 2)}
+
+
+async def run(args):
+    import httpx
+    from app.core.hashing import hasher
+    from app.core.security import get_password_hash
+    from app.db.models import User
+    from app.db.session import SessionLocal
+    from app.main import main
+
+    app = main()
+    password = get_password_hash("benchmark")
+    with SessionLocal() as db:
+        db.add_all(User(full_name=f"bench {i}", email=f"bench{i}@example.com", phone_number=f"bench-{i}",
+                        password=password) for i in range(args.users))
+        db.commit()
+
+    login_ms, probe_ms, failures = [], [], 0
+    done = asyncio.Event()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            slots = asyncio.Semaphore(args.concurrency)
+
+            async def login(i):
+                nonlocal failures
+                async with slots:
+                    start = time.perf_counter()
+                    r = await client.post("/auth/login", data={"username": f"bench{i % args.users}@example.com",
+                                                                "password": "benchmark"})
+                    login_ms.append((time.perf_counter() - start) * 1000)
+                    failures += r.status_code != 200
+
+            async def probe():
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await client.get("/books/")
+                    probe_ms.append((time.perf_counter() - start) * 1000)
+                    await asyncio.sleep(0.01)
+
+            prober = asyncio.create_task(probe())
+            start = time.perf_counter()
+            await asyncio.gather(*(login(i) for i in range(args.logins)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            await prober
+
+    return {
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "pool_size": hasher.pool_size,
+        "bcrypt_rounds": hasher.rounds,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(args.logins / elapsed, 2),
+        "login_latency_ms": percentiles(login_ms),
+        "probe_latency_ms": percentiles(probe_ms),
+        "hasher": hasher.stats(),
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="login-bench-")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    if args.pool_size is not None:
+        os.environ["HASH_POOL_SIZE"] = str(args.pool_size)
+    if args.rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
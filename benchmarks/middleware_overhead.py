@@ -0,0 +1,180 @@
+"""
+Middleware overhead benchmark
+-----------------------------
+
+Measures what the request-timing middleware adds to a trivial endpoint
+(GET /ping returning a small JSON body). Each variant is its own in-process app
+sharing one fresh SQLite database and a running event buffer; the variants take
+turns in small rounds so warm-up and machine noise hit them alike:
+
+- `none`          → no middleware (baseline)
+- `base_http`     → the previous BaseHTTPMiddleware implementation, kept here for comparison
+- `asgi`          → the current pure ASGI `ResponseTimeMiddleware`
+
+and prints per-request latency and overhead over the baseline as JSON.
+
+    python -m benchmarks.middleware_overhead --requests 5000 --concurrency 1
+
+Needs httpx (`pip install httpx`).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+VARIANTS = ("none", "base_http", "asgi")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="timed requests per variant")
+    parser.add_argument("--warmup", type=int, default=500, help="untimed requests per variant")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight at once")
+    parser.add_argument("--rounds", type=int, default=20, help="turns each variant gets")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    return parser.parse_args()
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": round(pick(0.50), 1), "p95": round(pick(0.95), 1), "p99": round(pick(0.99), 1),
+            "mean": round(statistics.fmean(ordered), 1)}
+
+
+def base_http_middleware():
+    """The BaseHTTPMiddleware version of `ResponseTimeMiddleware` this benchmark compares against."""
+    from fastapi import HTTPException, Request
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from app.api.deps import decode_request_token
+    from app.core import metrics
+    from app.services.event import queue_event
+    from app.utils import filters
+
+    class LegacyResponseTimeMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request: Request, call_next):
+            start = time.perf_counter()
+            metrics.track_in_flight(1)
+            try:
+                response = await call_next(request)
+            finally:
+                metrics.track_in_flight(-1)
+            elapsed = time.perf_counter() - start
+            route = getattr(request.scope.get("route"), "path", None) or "<unmatched>"
+            metrics.observe_request(route, request.method, response.status_code, elapsed)
+            duration_ms = int(elapsed * 1000)
+            response.headers["X-Response-Time"] = str(duration_ms)
+
+            user_id = None
+            auth = request.headers.get("authorization")
+            if auth and auth.startswith("Bearer "):
+                try:
+                    data = decode_request_token(request, auth.split(" ", 1)[1])
+                    if data and data.sub:
+                        user_id = int(data.sub)
+                except (HTTPException, ValueError, TypeError):
+                    pass
+            queue_event(
+                user_id=user_id,
+                status_code=response.status_code,
+                method=request.method,
+                duration_ms=duration_ms,
+                meta=filters(
+                    path=request.url.path,
+                    method=request.method,
+                    query_params=str(request.query_params) or None,
+                    user_agent=request.headers.get("user-agent"),
+                    content_length=response.headers.get("content-length"),
+                    remote_addr=getattr(request.client, "host", None),
+                ),
+            )
+            return response
+
+    return LegacyResponseTimeMiddleware
+
+
+def build_app(variant: str):
+    from fastapi import FastAPI
+
+    from app.api.deps import ResponseTimeMiddleware
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    if variant == "base_http":
+        app.add_middleware(base_http_middleware())
+    elif variant == "asgi":
+        app.add_middleware(ResponseTimeMiddleware)
+    return app
+
+
+async def measure(client, count: int, concurrency: int, samples: list | None = None) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with slots:
+            start = time.perf_counter()
+            r = await client.get("/ping")
+            if samples is not None:
+                samples.append((time.perf_counter() - start) * 1_000_000)
+            r.raise_for_status()
+
+    await asyncio.gather(*(call() for _ in range(count)))
+
+
+async def run(args):
+    import httpx
+    from app.db.session import Base, engine
+    from app.services.event import event_buffer
+
+    Base.metadata.create_all(bind=engine)
+    event_buffer.start()
+    try:
+        clients = {
+            variant: httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app(variant)), base_url="http://bench")
+            for variant in args.variants
+        }
+        samples = {variant: [] for variant in args.variants}
+        for client in clients.values():
+            await measure(client, args.warmup, args.concurrency)
+        per_round = max(1, args.requests // args.rounds)
+        for _ in range(args.rounds):
+            for variant, client in clients.items():
+                await measure(client, per_round, args.concurrency, samples[variant])
+        for client in clients.values():
+            await client.aclose()
+    finally:
+        event_buffer.stop()
+
+    latency = {variant: percentiles(values) for variant, values in samples.items()}
+    baseline = latency.get("none")
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "latency_us": latency,
+        "overhead_us": {
+            variant: {key: round(stats[key] - baseline[key], 1) for key in ("p50", "mean")}
+            for variant, stats in latency.items() if baseline and variant != "none"
+        },
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="middleware-bench-")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
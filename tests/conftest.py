@@ -0,0 +1,124 @@
+"""
+Test fixtures: the app runs against one throwaway SQLite file for the whole session,
+emptied before every test. Settings are read at import time, so the environment is
+set before anything from `app` is imported.
+"""
+
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="library-tests-")
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["HASH_POOL_SIZE"] = "0"
+os.environ["EVENT_RETENTION_INTERVAL_SECONDS"] = "0"
+os.environ["OVERDUE_CHECK_INTERVAL_SECONDS"] = "0"
+# A route over its DB_QUERY_BUDGETS entry, or running an N+1, answers 500 and fails its test.
+os.environ["DB_QUERY_STRICT"] = "true"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.enums import UserRole
+from app.core.security import get_password_hash
+from app.db.models import Book, User
+from app.db.session import Base, SessionLocal, engine
+from app.main import main
+from app.services import counters
+from app.services.statistics import statistics_cache
+from app.services.user import user_cache
+
+PASSWORD = "secret"
+
+
+@pytest.fixture(scope="session")
+def app():
+    return main()
+
+
+@pytest.fixture(autouse=True)
+def clean_database(app):
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    user_cache.clear()
+    statistics_cache.clear()
+    with SessionLocal() as db:
+        counters.rebuild(db)
+    yield
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def statements():
+    """SQL sent to the test database while the test runs."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def password() -> str:
+    """Plain password of every user made by `make_user`."""
+    return PASSWORD
+
+
+@pytest.fixture
+def make_user(db):
+    """Insert a user (password `PASSWORD`); returns it."""
+    created = []
+
+    def make(role: UserRole = UserRole.MEMBER, **fields) -> User:
+        n = len(created) + 1
+        user = User(full_name=f"user {n}", email=f"user{n}@example.com", phone_number=f"555-{n:04d}",
+                    password=get_password_hash(PASSWORD), role=role, is_active=True)
+        for name, value in fields.items():
+            setattr(user, name, value)
+        db.add(user)
+        db.commit()
+        created.append(user)
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_book(db):
+    def make(title: str = "Dune", author: str = "Herbert", copies: int = 1, **fields) -> Book:
+        book = Book(title=title, author=author, genre=fields.pop("genre", "fiction"),
+                    published_year=fields.pop("published_year", 1965), total_copies=copies,
+                    available_copies=fields.pop("available_copies", copies), **fields)
+        db.add(book)
+        db.commit()
+        return book
+
+    return make
+
+
+@pytest.fixture
+def login(client):
+    """Bearer headers for a user, through POST /auth/login."""
+
+    def headers(user: User) -> dict:
+        response = client.post("/auth/login", data={"username": user.email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return headers
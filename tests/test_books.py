@@ -0,0 +1,146 @@
+import json
+
+import pytest
+from sqlalchemy import delete, insert, select, text, update
+
+from app.core.enums import UserRole
+from app.db import fts
+from app.db.models import Book, Loan
+from app.services.base import encode_cursor
+from app.services.book import crud_book
+
+
+def walk(client, limit, **params):
+    """Follow X-Next-Cursor through every page of GET /books/; returns the ids in order."""
+    ids, after = [], None
+    while True:
+        response = client.get("/books/", params={**params, "limit": limit, **({"after": after} if after else {})})
+        assert response.status_code == 200, response.text
+        assert len(response.json()) <= limit
+        ids += [book["id"] for book in response.json()]
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            return ids
+
+
+def test_list_pages_round_trip(client, make_book):
+    books = [make_book(title=f"Book {n}") for n in range(7)]
+
+    assert walk(client, 3) == [book.id for book in books]
+
+
+def test_search_pages_round_trip(client, make_book):
+    # Equal titles tie on rank, so the id breaks the tie across page boundaries.
+    for title in ("Dune", "Dune Messiah", "Dune", "Children of Dune", "Dune", "Dune Dune", "Emma"):
+        make_book(title=title)
+    everything = client.get("/books/", params={"q": "dune", "limit": 50})
+    assert "X-Next-Cursor" not in everything.headers
+
+    ids = walk(client, 2, q="dune")
+    assert ids == [book["id"] for book in everything.json()]
+    assert len(ids) == 6
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(["x"]), encode_cursor([1, 2, 3])])
+@pytest.mark.parametrize("q", [None, "dune"])
+def test_malformed_cursor_is_rejected(client, make_book, cursor, q):
+    make_book()
+    response = client.get("/books/", params={"after": cursor, **({"q": q} if q else {})})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def search_ids(db, query):
+    books, _ = crud_book.search(db, query, limit=50)
+    return sorted(book.id for book in books)
+
+
+def assert_index_matches_books(db):
+    # Raises if books_fts differs from what rebuilding it from `books` would give.
+    db.execute(text("INSERT INTO books_fts(books_fts, rank) VALUES ('integrity-check', 1)"))
+
+
+def test_search_index_follows_inserts_updates_and_deletes(db, make_book):
+    dune = make_book(title="Dune")
+    db.execute(insert(Book).values(title="Emma", author="Austen", genre="fiction", published_year=1815,
+                                   total_copies=1, available_copies=1))
+    emma = db.scalar(select(Book.id).where(Book.title == "Emma"))
+    assert search_ids(db, "dune") == [dune.id]
+    assert search_ids(db, "austen") == [emma]
+
+    db.execute(update(Book).where(Book.id == dune.id).values(title="Solaris", author="Lem"))
+    assert search_ids(db, "dune") == []
+    assert search_ids(db, "solaris lem") == [dune.id]
+    # Updating other columns leaves the index alone.
+    db.execute(update(Book).where(Book.id == emma).values(available_copies=0))
+    assert search_ids(db, "emma") == [emma]
+
+    db.execute(delete(Book).where(Book.id == emma))
+    assert search_ids(db, "austen") == []
+    assert_index_matches_books(db)
+    db.commit()
+
+
+@pytest.mark.parametrize("query", ["dune", "DUN", "herb", "dune herb", "children dune", "fiction", "messiah x", "!!"])
+def test_like_fallback_finds_the_same_books(db, make_book, monkeypatch, query):
+    for title, author, genre in [("Dune", "Herbert", "fiction"), ("Dune Messiah", "Herbert", "fiction"),
+                                 ("Children of Dune", "Frank Herbert", "fiction"), ("Emma", "Austen", "romance"),
+                                 ("Dunes of Namibia", "Herbst", "travel"), ("Redune", "Other", "fiction")]:
+        make_book(title=title, author=author, genre=genre)
+    with_fts = search_ids(db, query)
+
+    monkeypatch.setattr(fts, "is_supported", lambda bind: False)
+    assert search_ids(db, query) == with_fts
+
+
+def test_import_rejects_impossible_copy_counts(client, login, make_user, db):
+    headers = login(make_user(UserRole.LIBRARIAN))
+    rows = [{"title": "Fine", "author": "A", "published_year": 2000, "available_copies": 2},
+            {"title": "Too many", "author": "A", "published_year": 2000, "available_copies": 3, "total_copies": 2},
+            {"title": "Negative", "author": "A", "published_year": 2000, "available_copies": -1, "total_copies": 2}]
+    upload = "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+    response = client.post("/books/import", headers=headers, files={"file": ("books.ndjson", upload)})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted"] == 1
+    assert [error["row"] for error in response.json()["errors"]] == [2, 3]
+    assert db.scalars(select(Book.total_copies)).all() == [2]
+
+
+def test_import_reports_bytes_that_are_not_utf8(client, login, make_user):
+    headers = login(make_user(UserRole.LIBRARIAN))
+    upload = b"title,author,published_year,available_copies\nDune,Herbert,1965,1\nCaf\xe9,X,2000,1\n"
+
+    response = client.post("/books/import", headers=headers, files={"file": ("books.csv", upload)})
+
+    # Reported as a row error, not a 500; this small file is decoded in one read, so no row gets in.
+    assert response.status_code == 200, response.text
+    assert response.json()["failed"] == 1
+    assert "not UTF-8" in response.json()["errors"][0]["error"]
+
+
+def test_created_book_embeds_no_loans_without_loading_them(client, login, make_user, statements):
+    headers = login(make_user(UserRole.LIBRARIAN))
+    statements.clear()
+
+    response = client.post("/books/", headers=headers, json={"title": "Dune", "author": "Herbert",
+                                                             "published_year": 1965, "available_copies": 1})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["loans"] == []
+    assert not [sql for sql in statements if "loans.id AS loans_id" in sql]
+
+
+def test_updated_book_embeds_a_bounded_loans_collection(client, login, make_user, make_book, db):
+    headers = login(make_user(UserRole.ADMIN))
+    book = make_book(copies=3, available_copies=0)
+    db.add_all(Loan(user_id=make_user().id, book_id=book.id) for _ in range(3))
+    db.commit()
+
+    response = client.put(f"/books/{book.id}", headers=headers, params={"nested_limit": 2}, json={"genre": "sf"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["genre"] == "sf"
+    assert len(response.json()["loans"]) == 2
@@ -0,0 +1,20 @@
+import json
+
+import pytest
+
+from app.core.enums import UserRole
+
+
+@pytest.mark.parametrize("params", [{"genre": "fiction"}, {"genre": "FICT"}, {"title": "dune"}, {"author": "herb"}])
+def test_book_export_filters_like_the_book_list(client, login, make_user, make_book, params):
+    headers = login(make_user(UserRole.LIBRARIAN))
+    make_book(title="Dune", genre="Science Fiction")
+    make_book(title="Emma", author="Austen", genre="fiction")
+    make_book(title="Cosmos", author="Sagan", genre="science")
+
+    listed = client.get("/books/", params=params).json()
+    exported = client.get("/exports/books", headers=headers, params=params)
+
+    assert exported.status_code == 200
+    assert [json.loads(line)["id"] for line in exported.text.splitlines()] == [book["id"] for book in listed]
+    assert listed
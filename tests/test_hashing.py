@@ -0,0 +1,50 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.core.hashing import PasswordHasher, hasher, password_context
+from app.db.models import User
+
+
+def test_login_rehashes_a_password_stored_at_another_cost(client, db, make_user, password):
+    old_hash = password_context(hasher.rounds + 1).hash(password)
+    user = make_user(password=old_hash)
+
+    response = client.post("/auth/login", data={"username": user.email, "password": password})
+
+    assert response.status_code == 200
+    stored = db.scalar(select(User.password).where(User.id == user.id).execution_options(populate_existing=True))
+    assert stored != old_hash
+    assert stored.startswith(f"$2b${hasher.rounds:02d}$")
+    assert password_context(hasher.rounds).verify(password, stored)
+
+
+def test_login_keeps_a_hash_at_the_current_cost(client, db, make_user, password):
+    user = make_user()
+    current = user.password
+
+    assert client.post("/auth/login", data={"username": user.email, "password": password}).status_code == 200
+    assert db.scalar(select(User.password).where(User.id == user.id)) == current
+
+
+def test_sync_verify_from_a_worker_thread_goes_through_the_app_loop():
+    pool = PasswordHasher(pool_size=1, max_pending=1, rounds=4)
+    hashed = password_context(4).hash("secret")
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        pool.start(loop)
+        try:
+            checks = await asyncio.gather(
+                asyncio.to_thread(pool.verify_and_update, "secret", hashed),
+                asyncio.to_thread(pool.verify_and_update, "wrong", hashed),
+            )
+        finally:
+            await asyncio.to_thread(pool.stop)
+        return loop, checks
+
+    loop, checks = asyncio.run(scenario())
+
+    assert checks == [(True, None), (False, None)]
+    assert loop in pool._slots  # the calls took a slot of the loop's HASH_MAX_PENDING semaphore
+    assert pool.stats()["completed"] == 2 and pool.stats()["in_flight"] == 0
@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.enums import UserRole
+from app.db.models import Book, Loan
+
+
+@pytest.fixture
+def librarian(make_user, login):
+    return login(make_user(role=UserRole.LIBRARIAN))
+
+
+@pytest.mark.parametrize("extra, days", [({"loan_days": 14}, 14), ({}, settings.LOAN_DAYS)])
+def test_batch_checkout_sets_the_due_date(client, librarian, make_user, make_book, extra, days):
+    member, book = make_user(), make_book(copies=2)
+    response = client.post("/loans/batch/checkout", headers=librarian,
+                           json={"items": [{"user_id": member.id, "book_id": book.id}], **extra})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["succeeded"] == 1
+    assert response.json()["results"][0]["loan"]["due_date"] == (date.today() + timedelta(days=days)).isoformat()
+
+
+@pytest.mark.parametrize("loan_days", [0, -30])
+def test_batch_checkout_rejects_a_loan_period_below_one_day(client, librarian, make_user, make_book, loan_days):
+    member, book = make_user(), make_book()
+    response = client.post("/loans/batch/checkout", headers=librarian,
+                           json={"items": [{"user_id": member.id, "book_id": book.id}], "loan_days": loan_days})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "loan_days"]
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/loans/batch/checkout", lambda n: {"items": [{"user_id": 1, "book_id": i} for i in range(n)]}),
+    ("/loans/batch/return", lambda n: {"loan_ids": list(range(n))}),
+])
+def test_batches_are_capped_by_the_schema(client, librarian, path, payload):
+    assert client.post(path, headers=librarian, json=payload(0)).status_code == 422
+    response = client.post(path, headers=librarian, json=payload(settings.LOAN_BATCH_MAX + 1))
+    assert response.status_code == 422
+    assert "at most" in response.json()["detail"][0]["msg"]
+
+
+def test_batch_return_rolls_back_when_a_copy_does_not_fit(client, librarian, db, make_user, make_book):
+    member = make_user()
+    full, other = make_book(title="Full", copies=1), make_book(title="Other", copies=1)
+    report = client.post("/loans/batch/checkout", headers=librarian,
+                         json={"items": [{"user_id": member.id, "book_id": book.id} for book in (full, other)]}).json()
+    loan_ids = [result["loan"]["id"] for result in report["results"]]
+    # The shelf count drifted: the lent copy is already back in available_copies.
+    db.execute(update(Book).where(Book.id == full.id).values(available_copies=1))
+    db.commit()
+
+    response = client.post("/loans/batch/return", headers=librarian, json={"loan_ids": loan_ids})
+
+    assert response.status_code == 409
+    db.expire_all()
+    assert [db.get(Loan, loan_id).return_date for loan_id in loan_ids] == [None, None]
+    assert db.get(Book, other.id).available_copies == 0
+
+
+def test_return_rolls_back_when_the_copy_does_not_fit(client, librarian, db, make_user, make_book):
+    member, book = make_user(), make_book(copies=1)
+    created = client.post("/loans/", headers=librarian, json={
+        "user_id": member.id, "book_id": book.id, "borrow_date": date.today().isoformat(),
+        "due_date": date.today().isoformat()})
+    assert created.status_code == 201, created.text
+    db.execute(update(Book).where(Book.id == book.id).values(available_copies=1))
+    db.commit()
+
+    response = client.put(f"/loans/return/{created.json()['id']}", headers=librarian)
+
+    assert response.status_code == 409
+    db.expire_all()
+    assert db.get(Loan, created.json()["id"]).return_date is None
+    assert db.get(Book, book.id).available_copies == 1
+
+
+def test_checkout_and_return_move_one_copy(client, librarian, db, make_user, make_book):
+    first, second, book = make_user(), make_user(), make_book(copies=1)
+    loan = {"book_id": book.id, "borrow_date": date.today().isoformat(), "due_date": date.today().isoformat()}
+
+    created = client.post("/loans/", headers=librarian, json={**loan, "user_id": first.id})
+    assert created.status_code == 201, created.text
+    assert client.post("/loans/", headers=librarian, json={**loan, "user_id": second.id}).status_code == 400
+    db.expire_all()
+    assert db.get(Book, book.id).available_copies == 0
+
+    assert client.put(f"/loans/return/{created.json()['id']}", headers=librarian).status_code == 200
+    assert client.put(f"/loans/return/{created.json()['id']}", headers=librarian).status_code == 409
+    db.expire_all()
+    assert db.get(Book, book.id).available_copies == 1
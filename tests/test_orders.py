@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.core.enums import OrderStatus
+from app.db.models import BookOrder, Loan
+from app.services import counters
+from app.services.loan import crud_loan
+from app.services.order import crud_order
+
+
+def add_waiting(db, user, book, priority=1):
+    """A WAITING order with `order_date` filled in by the database, as in production."""
+    db.execute(insert(BookOrder).values(user_id=user.id, book_id=book.id, priority=priority,
+                                        status=OrderStatus.WAITING, order_date=func.now()))
+    db.commit()
+    return db.scalars(select(BookOrder).order_by(BookOrder.id.desc())).first()
+
+
+def test_positions_of_orders_placed_in_the_same_second(db, make_user, make_book):
+    book = make_book(copies=1)
+    orders = [add_waiting(db, make_user(), book) for _ in range(3)]
+
+    assert [crud_order.position(db, order) for order in orders] == [1, 2, 3]
+    assert crud_order.count_waiting(db, book.id) == 3
+
+
+def test_priority_goes_ahead_of_earlier_orders(db, make_user, make_book):
+    book = make_book(copies=1)
+    first = add_waiting(db, make_user(), book)
+    urgent = add_waiting(db, make_user(), book, priority=3)
+
+    assert crud_order.position(db, urgent) == 1
+    assert crud_order.position(db, first) == 2
+
+
+def test_position_endpoint(client, login, db, make_user, make_book):
+    member = make_user()
+    book = make_book(copies=1)
+    order = add_waiting(db, member, book)
+
+    body = client.get(f"/orders/{order.id}/position", headers=login(member)).json()
+    assert body["position"] == 1 and body["total_waiting"] == 1
+
+
+def test_return_serves_the_waiting_list_and_updates_counters(db, make_user, make_book):
+    borrower, holder = make_user(), make_user()
+    book = make_book(copies=2, available_copies=0)
+    today = date.today()
+    loans = [Loan(user_id=user.id, book_id=book.id, borrow_date=today, due_date=today + timedelta(days=7))
+             for user in (borrower, holder)]
+    db.add_all(loans)
+    db.commit()
+    waiting = [add_waiting(db, make_user(), book) for _ in range(3)]
+    add_waiting(db, holder, book)  # already holds a copy: passed over
+    counters.rebuild(db)
+
+    report = crud_loan.return_many(db, [loan.id for loan in loans])
+
+    assert report.succeeded == 2
+    db.expire_all()
+    assert [order.status for order in waiting] == [OrderStatus.FULFILLED, OrderStatus.FULFILLED, OrderStatus.WAITING]
+    assert counters.read(db)["waiting_orders"] == 2
+    live = counters.read(db)
+    assert counters.rebuild(db) == live
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select
+
+from app.db.models import Loan
+from app.services import overdue
+from app.services.loan import crud_loan
+
+
+def overdue_ids(db):
+    return sorted(loan.id for loan in overdue.query_loans(db).all())
+
+
+def test_refresh_and_writes_keep_the_overdue_set(db, make_user, make_book):
+    member, book = make_user(), make_book(copies=2, available_copies=0)
+    today = date.today()
+    db.execute(insert(Loan), [
+        {"user_id": member.id, "book_id": book.id, "borrow_date": today - timedelta(days=40),
+         "due_date": today - timedelta(days=10)},
+        {"user_id": member.id, "book_id": book.id, "borrow_date": today, "due_date": today + timedelta(days=30)},
+    ])
+    late, on_time = db.scalars(select(Loan.id).order_by(Loan.id)).all()
+
+    assert overdue.refresh(db) == {"added": 1, "removed": 0}
+    assert overdue.refresh(db) == {"added": 0, "removed": 0}
+    assert overdue_ids(db) == [late]
+    assert overdue.count_users(db) == 1
+
+    crud_loan.return_book(db, late)
+    assert overdue_ids(db) == []
+    # A due date moved into the past by a write is picked up without a refresh.
+    crud_loan.update(db, db_obj=db.get(Loan, on_time), obj_in={"due_date": today - timedelta(days=1)})
+    assert overdue_ids(db) == [on_time]
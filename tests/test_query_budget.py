@@ -0,0 +1,112 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.api.deps import ResponseTimeMiddleware
+from app.core.enums import UserRole
+from app.core.query_budget import query_budgets
+from app.db.models import Loan
+from app.db.session import QueryStats, SessionLocal
+
+
+@pytest.fixture
+def catalog(db, make_user, make_book):
+    """60 books, each lent to two members (the nested `loans` collection is never empty)."""
+    members = [make_user(), make_user()]
+    books = [make_book(title=f"Book {i}", copies=3) for i in range(60)]
+    db.add_all(Loan(user_id=member.id, book_id=book.id) for book in books for member in members)
+    db.commit()
+    return books
+
+
+def test_the_suite_runs_in_strict_mode():
+    # Set in conftest: every other test fails on a route over its budget or running an N+1.
+    assert query_budgets.strict
+
+
+def test_book_list_with_nested_loans_stays_within_budget(client, login, make_user, catalog):
+    headers = login(make_user(UserRole.ADMIN))
+    budget = query_budgets.budget("GET", "/books/")
+    assert budget
+
+    response = client.get("/books/", params={"limit": 50, "include": "loans"}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 50 and all(len(book["loans"]) == 2 for book in response.json())
+    assert int(response.headers["X-DB-Queries"]) <= budget
+    assert float(response.headers["X-DB-Time"]) >= 0
+
+
+def test_over_budget_route_is_rejected_in_strict_mode(monkeypatch, client, login, make_user, catalog):
+    headers = login(make_user(UserRole.ADMIN))
+    monkeypatch.setitem(query_budgets.budgets, "GET /books/", 1)
+
+    response = client.get("/books/", params={"limit": 50}, headers=headers)
+
+    assert response.status_code == 500
+    assert response.json()["problems"] == [f"{response.headers['X-DB-Queries']} queries, budget 1"]
+
+
+def test_over_budget_route_is_only_logged_outside_strict_mode(monkeypatch, client, login, make_user, catalog, caplog):
+    headers = login(make_user(UserRole.ADMIN))
+    monkeypatch.setattr(query_budgets, "strict", False)
+    monkeypatch.setitem(query_budgets.budgets, "GET /books/", 1)
+
+    response = client.get("/books/", params={"limit": 50}, headers=headers)
+
+    assert response.status_code == 200
+    assert "budget 1" in caplog.text
+
+
+def test_repeated_select_with_different_parameters_is_an_n_plus_one():
+    stats = QueryStats()
+    for user_id in range(12):
+        stats.record("SELECT * FROM users WHERE users.id = ?", (user_id,), False)
+    stats.record("SELECT * FROM books WHERE books.id = ?", (1,), False)
+    stats.record("SELECT * FROM books WHERE books.id = ?", (1,), False)
+
+    problems = query_budgets.check("GET", "/anything", stats)
+
+    assert stats.count == 14
+    assert problems == ["N+1: 12 parameter sets for SELECT * FROM users WHERE users.id = ?"]
+
+
+def test_n_plus_one_route_is_rejected_in_strict_mode(make_user):
+    ids = [make_user().id for _ in range(query_budgets.repeat_limit + 1)]
+    app = FastAPI()
+    app.add_middleware(ResponseTimeMiddleware)
+
+    @app.get("/names")
+    def names():
+        with SessionLocal() as db:
+            return [db.scalar(text("SELECT full_name FROM users WHERE id = :id"), {"id": user_id}) for user_id in ids]
+
+    with TestClient(app) as test_client:
+        response = test_client.get("/names")
+
+    assert response.status_code == 500
+    assert response.json()["problems"] == [f"N+1: {len(ids)} parameter sets for SELECT full_name FROM users WHERE id = ?"]
+
+
+def test_statements_in_dependency_teardown_are_counted():
+    """`get_uow` commits in its teardown; a `yield` dependency exits before the response starts."""
+
+    def session_with_teardown_query():
+        with SessionLocal() as db:
+            yield db
+            db.execute(text("SELECT 1 WHERE 1 = :one"), {"one": 1})
+
+    app = FastAPI()
+    app.add_middleware(ResponseTimeMiddleware)
+
+    @app.get("/probe")
+    def probe(db: Session = Depends(session_with_teardown_query)):
+        db.execute(text("SELECT 2"))
+        return {}
+
+    with TestClient(app) as test_client:
+        response = test_client.get("/probe")
+
+    assert response.headers["X-DB-Queries"] == "2"
@@ -0,0 +1,16 @@
+import pytest
+
+from app.services import query_plans
+
+
+@pytest.mark.parametrize("name, call", query_plans.CASES, ids=[name for name, _ in query_plans.CASES])
+def test_hot_query_is_served_by_an_index(name, call):
+    result = query_plans.run_case(name, call)
+    assert result.plans, "the case ran no statements"
+    assert result.ok, "\n".join(result.scans)
+
+
+def test_full_scans_are_reported():
+    plan = ["SEARCH books USING INTEGER PRIMARY KEY (rowid=?)", "SCAN loans", "SCAN loans_1 USING INDEX ix_loans_id",
+            "SCAN library_counters", "SCAN CONSTANT ROW", "CO-ROUTINE anon_1", "SCAN anon_1"]
+    assert query_plans.full_scans(plan) == ["SCAN loans", "SCAN loans_1 USING INDEX ix_loans_id"]
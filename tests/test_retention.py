@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.db.models.event import Event
+from app.services import retention
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+def add_events(db, *moments, weight=1.0):
+    db.execute(insert(Event), [{"timestamp": moment, "method": "GET", "status_code": 200, "duration_ms": 5,
+                                "sample_weight": weight, "meta_data": {"path": "/books/"}} for moment in moments])
+    db.commit()
+
+
+def test_count_events_since_starts_at_the_exact_moment(db):
+    add_events(db, NOW.replace(hour=9, minute=10), NOW.replace(hour=10, minute=30), NOW.replace(hour=11, minute=50))
+    add_events(db, NOW.replace(hour=9, minute=40), weight=2.0)
+    retention.roll_up(db, NOW)
+    assert retention.rolled_up_through(db) == NOW.replace(hour=11)
+
+    # 09:40 comes from the raw rows of a rolled-up hour, 11:50 from past the watermark.
+    assert retention.count_events_since(db, NOW.replace(hour=9, minute=30)) == 4
+    assert retention.count_events_since(db, NOW.replace(hour=10)) == 2
+    assert retention.count_events_since(db, NOW.replace(hour=11, minute=55)) == 0
+    assert retention.count_events_since(db, NOW - timedelta(days=1)) == 5
+
+
+def test_prune_never_deletes_events_that_are_not_rolled_up(db):
+    add_events(db, NOW - timedelta(days=40), NOW - timedelta(days=35), NOW - timedelta(days=1))
+    retention.roll_up(db, NOW - timedelta(days=37))
+
+    # Both of the oldest are past retention, but only the first is in a rollup yet.
+    assert retention.prune(db, NOW) == 1
+    assert db.scalar(select(func.min(Event.timestamp))) == NOW - timedelta(days=35)
+
+    retention.roll_up(db, NOW)
+    assert retention.prune(db, NOW) == 1
+    assert db.scalar(select(func.count(Event.id))) == 1
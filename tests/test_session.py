@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.db.models.counter import LibraryCounter
+from app.db.session import upsert
+
+
+@pytest.mark.parametrize("dialect", [sqlite.dialect(), postgresql.dialect()])
+def test_upsert_speaks_the_session_dialect(dialect):
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=dialect))
+    stmt = upsert(db, LibraryCounter).values(name="on_loan", value=1)
+    stmt = stmt.on_conflict_do_update(index_elements=[LibraryCounter.name],
+                                      set_={"value": LibraryCounter.value + stmt.excluded.value})
+
+    sql = str(stmt.compile(dialect=dialect))
+    assert "ON CONFLICT (name) DO UPDATE SET value = (library_counters.value + excluded.value)" in sql
+
+
+def test_upsert_refuses_other_dialects():
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=mysql.dialect()))
+    with pytest.raises(NotImplementedError):
+        upsert(db, LibraryCounter)
@@ -0,0 +1,28 @@
+from app.core.enums import UserRole
+
+
+def lazy_loads(statements):
+    """SELECTs of loan or event rows (the counters' aggregate queries do not count)."""
+    return [sql for sql in statements if "loans.id AS loans_id" in sql or "events.id AS events_id" in sql]
+
+
+def test_created_user_embeds_empty_collections_without_loading_them(client, login, make_user, statements):
+    headers = login(make_user(UserRole.ADMIN))
+    statements.clear()
+
+    response = client.post("/users/", headers=headers, json={
+        "full_name": "New Member", "email": "new@example.com", "phone_number": "555-9999",
+        "role": "member", "is_active": True, "password": "secret"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["loans"] == [] and response.json()["events"] == []
+    assert not lazy_loads(statements)
+
+
+def test_signup_embeds_empty_collections_without_loading_them(client, statements):
+    response = client.post("/auth/signup", json={"full_name": "Self Made", "email": "self@example.com",
+                                                 "phone_number": "555-8888", "password": "secret"})
+
+    assert response.status_code == 201, response.text
+    assert response.json()["loans"] == [] and response.json()["events"] == []
+    assert not lazy_loads(statements)